@@ -0,0 +1,143 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import dxf2model
+from conversion_cache import ConversionCache, DEFAULT_MAX_SIZE
+from metrics import Metrics
+
+
+def find_dxf_files(inputs):
+    """Expands the given DXF files, directories (searched recursively) and glob patterns into a sorted file list."""
+    dxf_files = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if name.lower().endswith(".dxf"):
+                        dxf_files.add(os.path.join(root, name))
+        else:
+            for match in glob.glob(path, recursive=True):
+                if os.path.isfile(match):
+                    dxf_files.add(match)
+    return sorted(dxf_files)
+
+
+def output_dir_for(dxf_file, base_dir, output_root):
+    """Mirrors the location of the DXF file below base_dir into output_root, e.g. <root>/799C8-V016028-Meise/V016028v07_GPL_R12."""
+    relative = os.path.relpath(os.path.splitext(dxf_file)[0], base_dir)
+    return os.path.join(output_root, relative)
+
+
+def convert_one(dxf_file, output_dir, stream, cache_dir=None, cache_max_size=DEFAULT_MAX_SIZE, metrics=False):
+    """
+    Runs the conversion of a single file in a worker; failures are returned instead of raised.
+    With metrics the report of the instrumented conversion (see metrics.py) is added to the result.
+    """
+    start = time.perf_counter()
+    result = {"dxf_file": dxf_file, "output_dir": output_dir}
+    file_metrics = Metrics() if metrics else None
+    try:
+        cache = ConversionCache(cache_dir, cache_max_size) if cache_dir else None
+        stats = dxf2model.convert_file(dxf_file, output_dir, stream=stream, cache=cache, metrics=file_metrics)
+        result.update(stats)
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+    if file_metrics is not None:
+        result["metrics"] = file_metrics.report()
+    return result
+
+
+def convert_batch(dxf_files, output_root, workers=None, stream=False, base_dir=None, progress=None,
+                  cache_dir=None, cache_max_size=DEFAULT_MAX_SIZE, metrics=False):
+    """
+    Converts all DXF files in a process pool with the given number of workers (default: all cores).
+    Every file is isolated: an error in one file (or a crashed worker) is reported in its result and
+    does not stop the batch. Returns the per-file results and a throughput summary.
+    """
+    if base_dir is None:
+        base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in dxf_files]) if dxf_files else "."
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_one, dxf_file, output_dir_for(os.path.abspath(dxf_file), base_dir, output_root), stream,
+                            cache_dir, cache_max_size, metrics): dxf_file
+            for dxf_file in dxf_files
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # the worker process itself died
+                result = {"dxf_file": futures[future], "status": "error", "error": f"{type(e).__name__}: {e}"}
+            results.append(result)
+            if progress:
+                progress(result)
+    elapsed = time.perf_counter() - start
+
+    results.sort(key=lambda r: r["dxf_file"])
+    converted = [r for r in results if r["status"] == "ok"]
+    entities = sum(r["entities"] for r in converted)
+    summary = {
+        "files": len(results),
+        "converted": len(converted),
+        "cached": sum(1 for r in converted if r.get("cached")),
+        "failed": len(results) - len(converted),
+        "entities": entities,
+        "seconds": elapsed,
+        "files_per_second": len(converted) / elapsed if elapsed else 0.0,
+        "entities_per_second": entities / elapsed if elapsed else 0.0,
+    }
+    return results, summary
+
+
+def print_result(result):
+    if result["status"] == "ok":
+        cached = ", cached" if result.get("cached") else ""
+        print(f"ok     {result['dxf_file']} ({result['entities']} entities, {result['seconds']:.2f}s{cached})")
+    else:
+        print(f"FAILED {result['dxf_file']}: {result['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converts many DXF files in parallel with dxf2model.")
+    parser.add_argument("inputs", nargs="+", help="DXF files, directories or glob patterns (e.g. 'kruispunten/**/*.dxf')")
+    parser.add_argument("-o", "--output-dir", default="output", help="root directory for the per-file output directories")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser.add_argument("--stream", action="store_true", help="only write the JSONL files")
+    parser.add_argument("--cache-dir", help="skip files that are unchanged since their conversion was cached here")
+    parser.add_argument("--cache-max-size", type=float, default=DEFAULT_MAX_SIZE / (1024 * 1024), help="maximum cache size in MB")
+    parser.add_argument("--report", help="write the per-file results and summary as JSON to this file")
+    parser.add_argument("--metrics", action="store_true", help="add the timing spans and counters of every conversion to the report")
+    args = parser.parse_args(argv)
+
+    dxf_files = find_dxf_files(args.inputs)
+    if not dxf_files:
+        print("No DXF files found.")
+        return 1
+
+    results, summary = convert_batch(dxf_files, args.output_dir, workers=args.workers, stream=args.stream, progress=print_result,
+                                     cache_dir=args.cache_dir, cache_max_size=int(args.cache_max_size * 1024 * 1024),
+                                     metrics=args.metrics)
+
+    print()
+    print(f"Converted {summary['converted']}/{summary['files']} files ({summary['cached']} from cache, {summary['failed']} failed) in {summary['seconds']:.2f}s")
+    print(f"Throughput: {summary['files_per_second']:.2f} files/s, {summary['entities_per_second']:.0f} entities/s")
+
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump({"summary": summary, "results": results}, report_file, indent=4)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark of the entity extraction: the reflective extraction that process_entities used before
+(vars(entity.dxf) with list lookups and an if/elif chain on dxftype()) against the precompiled
+extractors in dxf_extractors.
+
+    python -m benchmarks.bench_extractors --entities 100000
+"""
+import argparse
+import gc
+import time
+
+from dxf_extractors import convert_value, extract_entity
+from benchmarks.synthetic import make_drawing
+
+
+def legacy_process_entities(entities):
+    """The extraction of process_entities before dxf_extractors, kept as the baseline."""
+    entities_data = []
+    for entity in entities:
+        entity_data = {
+            "type": entity.dxftype(),
+            "id": entity.dxf.handle
+        }
+        skip_keys = ["location", "vtx0", "vtx1", "vtx2", "vtx3", "start", "end", "insert", "_entity", "owner", "handle", "center"]
+        for key, value in vars(entity.dxf).items():
+            if (key not in skip_keys):
+                if (key in ['rotation', 'xscale', 'yscale', 'radius', 'start_angle', 'end_angle', 'color']):
+                    entity_data[key] = float(value)
+                else:
+                    entity_data[key] = convert_value(value)
+
+        if entity.dxftype() == "POINT":
+            entity_data["coordinates"] = convert_value(entity.dxf.location)
+        elif entity.dxftype() == "LINE":
+            entity_data["coordinates"] = [convert_value(entity.dxf.start), convert_value(entity.dxf.end)]
+        elif entity.dxftype() == "CIRCLE":
+            entity_data["coordinates"] = convert_value(entity.dxf.center)
+            entity_data["radius"] = float(entity.dxf.radius)
+        elif entity.dxftype() == "TEXT":
+            entity_data["text"] = entity.dxf.text
+            entity_data["coordinates"] = convert_value(entity.dxf.insert)
+        elif entity.dxftype() == "ARC":
+            entity_data["coordinates"] = convert_value(entity.dxf.center)
+        elif entity.dxftype() == "POLYLINE":
+            entity_data["coordinates"] = [[vertex.dxf.location.x, vertex.dxf.location.y] for vertex in entity.vertices]
+            entity_data["is_closed"] = entity.is_closed
+        elif entity.dxftype() == "SOLID":
+            entity_data["coordinates"] = [convert_value(entity.dxf.vtx0), convert_value(entity.dxf.vtx1), convert_value(entity.dxf.vtx2), convert_value(entity.dxf.vtx3)]
+        elif entity.dxftype() == "LWPOLYLINE":
+            entity_data["coordinates"] = [[point[0], point[1]] for point in entity]
+            entity_data["is_closed"] = entity.is_closed
+        elif entity.dxftype() == "INSERT":
+            attribs_data_list = []
+            for attrib in entity.attribs:
+                attrib_data = {
+                    "type": attrib.dxftype(),
+                    "id": attrib.dxf.handle
+                }
+                for key, value in vars(attrib.dxf).items():
+                    if (key not in ["insert", "_entity", "handle"]):
+                        if (key in ['rotation', 'xscale', 'yscale', 'radius', 'start_angle', 'end_angle', 'color']):
+                            attrib_data[key] = float(value)
+                        else:
+                            attrib_data[key] = convert_value(value)
+                attrib_data["coordinates"] = convert_value(attrib.dxf.insert)
+                if attrib_data["text"]:
+                    attribs_data_list.append(attrib_data)
+            entity_data["attribs"] = attribs_data_list
+            entity_data["coordinates"] = convert_value(entity.dxf.insert)
+        entities_data.append(entity_data)
+    return entities_data
+
+
+def precompiled_process_entities(entities):
+    return [extract_entity(entity) for entity in entities]
+
+
+def best_of(func, entities, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(entities)  # the result is dropped right away, so no run pays for the garbage of another
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares the legacy and the precompiled entity extraction.")
+    parser.add_argument("--entities", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"Building a synthetic drawing with {args.entities} entities ...")
+    entities = list(make_drawing(args.entities).modelspace())
+    # like dxf2model.convert_file: keep the garbage collector from re-scanning the drawing, so only the extraction is measured
+    gc.collect()
+    gc.freeze()
+
+    assert legacy_process_entities(entities) == precompiled_process_entities(entities), "the precompiled extractors changed the output"
+
+    legacy_time = best_of(legacy_process_entities, entities, args.repeat)
+    precompiled_time = best_of(precompiled_process_entities, entities, args.repeat)
+
+    print(f"legacy       {len(entities) / legacy_time:12,.0f} entities/s ({legacy_time:.3f}s)")
+    print(f"precompiled  {len(entities) / precompiled_time:12,.0f} entities/s ({precompiled_time:.3f}s)")
+    print(f"speedup      {legacy_time / precompiled_time:12.2f}x")
+
+
+if __name__ == '__main__':
+    main()
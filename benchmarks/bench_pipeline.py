@@ -0,0 +1,206 @@
+"""
+Benchmark of the whole pipeline on synthetic R12 plans (see synthetic.make_plan) at several scales.
+Every stage is timed (best of --repeat runs) and, in a separate run under tracemalloc, its peak memory is
+measured; the results are written as JSON and can be compared with an earlier run to catch regressions.
+
+    python -m benchmarks.bench_pipeline --scale small --scale medium -o bench_results.json
+    python -m benchmarks.bench_pipeline --scale medium --compare bench_results.json
+
+Stages: load (ezdxf.readfile), blocks (block analysis), extract (entity extraction), serialize (JSON + JSONL)
+and render (SVG from the JSONL file).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import ezdxf
+
+import data2svg
+import dxf2model
+import serializer
+from block_graph import BlockGraph
+from bounds import add_bboxes
+from benchmarks.synthetic import make_plan
+
+SCALES = {
+    "small": {"entities": 2_000, "inserts": 100, "attribs": 2, "depth": 2},
+    "medium": {"entities": 20_000, "inserts": 1_000, "attribs": 5, "depth": 3},
+    "large": {"entities": 100_000, "inserts": 5_000, "attribs": 10, "depth": 4},
+}
+STAGES = ("load", "blocks", "extract", "serialize", "render")
+
+
+def plan_file(work_dir, name, params):
+    """Writes the synthetic plan for the parameters once, later runs reuse the file."""
+    key = "-".join(f"{key}{value}" for key, value in sorted(params.items()))
+    dxf_file = os.path.join(work_dir, f"{name}-{key}.dxf")
+    if not os.path.exists(dxf_file):
+        make_plan(**params).saveas(dxf_file)
+    return dxf_file
+
+
+def pipeline(dxf_file, output_dir, writer="stream"):
+    """The stages as (name, function) pairs, which pass their results on through a shared state."""
+    state = {}
+    json_file = os.path.join(output_dir, "dxf_entities.json")
+    jsonl_file = os.path.join(output_dir, "dxf_entities.jsonl")
+
+    def load():
+        state["doc"] = ezdxf.readfile(dxf_file)
+
+    def blocks():
+        graph = BlockGraph.from_document(state["doc"])
+        state["empty_blocks"] = graph.empty_blocks()
+        state["unused_blocks"] = graph.unused_blocks()
+        state["block_order"] = graph.dependency_order()
+
+    def extract():
+        # like dxf2model.convert_file, with the loaded document frozen
+        gc.collect()
+        gc.freeze()
+        try:
+            records = dxf2model.iter_document(state["doc"], state["empty_blocks"], state["unused_blocks"],
+                                              block_order=state["block_order"])
+            state["records"] = list(add_bboxes(records))
+        finally:
+            gc.unfreeze()
+        del state["doc"]
+
+    def serialize():
+        with open(json_file, "wb") as f, open(jsonl_file, "wb") as g:
+            state["record_count"] = serializer.write_json_and_jsonl(state.pop("records"), f, g)
+
+    def render():
+        data2svg.main(jsonl_file, os.path.join(output_dir, "output.svg"), writer=writer)
+
+    return [("load", load), ("blocks", blocks), ("extract", extract), ("serialize", serialize), ("render", render)], state
+
+
+def run_pipeline(dxf_file, output_dir, writer, memory=False):
+    """Runs all stages once and returns {stage: seconds} (or {stage: peak traced bytes} with memory) and the record count."""
+    stages, state = pipeline(dxf_file, output_dir, writer)
+    measurements = {}
+    for name, func in stages:
+        if memory:
+            tracemalloc.start()
+            func()
+            measurements[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            func()
+            measurements[name] = time.perf_counter() - start
+    return measurements, state["record_count"]
+
+
+def benchmark(name, params, work_dir, repeat=3, writer="stream", memory=True):
+    dxf_file = plan_file(work_dir, name, params)
+    output_dir = os.path.join(work_dir, f"{name}-output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    runs = [run_pipeline(dxf_file, output_dir, writer) for _ in range(repeat)]
+    seconds = {stage: min(run[0][stage] for run in runs) for stage in STAGES}
+    peaks = run_pipeline(dxf_file, output_dir, writer, memory=True)[0] if memory else {}
+    return {
+        "scale": name,
+        "params": params,
+        "dxf_size": os.path.getsize(dxf_file),
+        "records": runs[0][1],
+        "stages": {stage: {"seconds": seconds[stage], "peak_memory": peaks.get(stage)} for stage in STAGES},
+        "total_seconds": sum(seconds.values()),
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ezdxf": ezdxf.__version__,
+        "json_backend": serializer.get_backend().name,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Stages that got slower than the baseline by more than the tolerance (a fraction), as printable lines."""
+    previous = {result["scale"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        if result["scale"] not in previous:
+            continue
+        for stage, measured in result["stages"].items():
+            before = previous[result["scale"]]["stages"].get(stage)
+            if not before or not before["seconds"]:
+                continue
+            ratio = measured["seconds"] / before["seconds"]
+            line = f"{result['scale']:8} {stage:10} {before['seconds']:9.3f}s -> {measured['seconds']:9.3f}s ({ratio:5.2f}x)"
+            print(line)
+            if ratio > 1 + tolerance:
+                regressions.append(line)
+    return regressions
+
+
+def print_result(result):
+    print(f"{result['scale']} ({result['records']} records, {result['dxf_size'] / 1e6:.1f} MB DXF, "
+          + ", ".join(f"{key}={value}" for key, value in result["params"].items()) + ")")
+    for stage, measured in result["stages"].items():
+        peak = f"{measured['peak_memory'] / 1e6:9.1f} MB" if measured["peak_memory"] is not None else ""
+        print(f"  {stage:10} {measured['seconds']:9.3f}s {peak}")
+    print(f"  {'total':10} {result['total_seconds']:9.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the conversion and rendering stages on synthetic plans.")
+    parser.add_argument("--scale", action="append", choices=sorted(SCALES), help="predefined scale (repeatable, default: small)")
+    parser.add_argument("--entities", type=int, help="custom scale: modelspace primitives")
+    parser.add_argument("--inserts", type=int, default=500, help="custom scale: modelspace INSERTs")
+    parser.add_argument("--attribs", type=int, default=4, help="custom scale: ATTRIBs per INSERT")
+    parser.add_argument("--depth", type=int, default=2, help="custom scale: block nesting depth")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scale, the best one counts")
+    parser.add_argument("--writer", choices=["svgwrite", "stream"], default="stream")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--work-dir", help="keep the generated plans and outputs here (default: a temporary directory)")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown per stage for --compare (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    scales = {name: SCALES[name] for name in args.scale or ([] if args.entities else ["small"])}
+    if args.entities:
+        scales["custom"] = {"entities": args.entities, "inserts": args.inserts, "attribs": args.attribs, "depth": args.depth}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = args.work_dir or temp_dir
+        os.makedirs(work_dir, exist_ok=True)
+        results = []
+        for name, params in scales.items():
+            result = benchmark(name, params, work_dir, args.repeat, args.writer, memory=not args.no_memory)
+            print_result(result)
+            results.append(result)
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=4)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        print()
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than {args.compare} by more than {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
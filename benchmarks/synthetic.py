@@ -0,0 +1,100 @@
+import random
+
+import ezdxf
+
+# one "unit" of modelspace content, repeated until the requested entity count is reached
+MODELSPACE_TYPES = ("LINE", "POLYLINE", "LWPOLYLINE", "CIRCLE", "ARC", "TEXT", "SOLID", "POINT", "INSERT")
+
+
+def make_drawing(entity_count=100_000, dxfversion="R2000", seed=42):
+    """
+    Builds an in-memory drawing with roughly entity_count modelspace entities of all types that
+    dxf2model exports, plus a small signal block with an ATTDEF that is inserted with an ATTRIB.
+    LWPOLYLINE needs DXF R2000 or later, for R12 drawings it is replaced by POLYLINE.
+    """
+    rnd = random.Random(seed)
+    doc = ezdxf.new(dxfversion)
+    msp = doc.modelspace()
+
+    block = doc.blocks.new("SIGNAL")
+    block.add_line((0, 0), (1, 0), dxfattribs={"layer": "SIGNALS"})
+    block.add_circle((0.5, 0.5), 0.25, dxfattribs={"layer": "SIGNALS"})
+    block.add_attdef("NR", (0, 1), dxfattribs={"height": 0.3})
+
+    layers = [f"LAYER_{i}" for i in range(20)]
+    for i in range(entity_count):
+        dxftype = MODELSPACE_TYPES[i % len(MODELSPACE_TYPES)]
+        x, y = rnd.uniform(0, 1000), rnd.uniform(0, 1000)
+        attribs = {"layer": layers[i % len(layers)]}
+        if dxftype == "INSERT":
+            insert = msp.add_blockref("SIGNAL", (x, y), dxfattribs=dict(attribs, rotation=90, xscale=2, yscale=2))
+            insert.add_attrib("NR", str(i), (x, y + 1))
+        else:
+            add_primitive(msp, dxftype, i, x, y, attribs)
+    return doc
+
+
+def add_primitive(layout, dxftype, i, x, y, attribs):
+    """Adds one entity of the given type at (x, y); LWPOLYLINE becomes POLYLINE in R12 drawings."""
+    if dxftype == "LINE":
+        layout.add_line((x, y), (x + 5, y + 3), dxfattribs=attribs)
+    elif dxftype == "POLYLINE" or (dxftype == "LWPOLYLINE" and layout.doc.dxfversion <= "AC1009"):
+        layout.add_polyline2d([(x, y), (x + 2, y + 1), (x + 4, y)], close=i % 2 == 0, dxfattribs=attribs)
+    elif dxftype == "LWPOLYLINE":
+        layout.add_lwpolyline([(x, y), (x + 2, y + 1), (x + 4, y)], close=i % 2 == 0, dxfattribs=attribs)
+    elif dxftype == "CIRCLE":
+        layout.add_circle((x, y), 1.5, dxfattribs=attribs)
+    elif dxftype == "ARC":
+        layout.add_arc((x, y), 2, 0, 120, dxfattribs=attribs)
+    elif dxftype == "TEXT":
+        layout.add_text(f"T{i}", dxfattribs=dict(attribs, insert=(x, y), height=0.5, rotation=15))
+    elif dxftype == "SOLID":
+        layout.add_solid([(x, y), (x + 1, y), (x, y + 1), (x + 1, y + 1)], dxfattribs=attribs)
+    elif dxftype == "POINT":
+        layout.add_point((x, y), dxfattribs=attribs)
+
+
+def make_plan(entities=10_000, inserts=500, attribs=4, depth=2, block_entities=8, extent=1000.0, dxfversion="R12", seed=42):
+    """
+    Builds a traffic-plan like drawing at a configurable scale, as an R12 drawing by default like the real plans:
+
+    - entities: modelspace primitives of all types that dxf2model exports (INSERTs not included)
+    - inserts: modelspace INSERTs of the CABINET_0 block, rotated and scaled, each with attribs ATTRIBs
+    - depth: CABINET_0 inserts CABINET_1, which inserts CABINET_2, ... down to CABINET_<depth-1>
+    - block_entities: primitives per block, every block also has attribs ATTDEFs
+
+    An empty and an unused block are added as well, so the block analysis has something to find.
+    """
+    rnd = random.Random(seed)
+    doc = ezdxf.new(dxfversion)
+    msp = doc.modelspace()
+    primitive_types = [dxftype for dxftype in MODELSPACE_TYPES if dxftype != "INSERT"]
+
+    tags = [f"ATTR_{i}" for i in range(attribs)]
+    for level in reversed(range(max(depth, 1))):
+        block = doc.blocks.new(f"CABINET_{level}")
+        for i in range(block_entities):
+            add_primitive(block, primitive_types[i % len(primitive_types)], i, rnd.uniform(-2, 2), rnd.uniform(-2, 2), {"layer": "0"})
+        for i, tag in enumerate(tags):
+            block.add_attdef(tag, (0, -0.5 * (i + 1)), dxfattribs={"height": 0.25})
+        if level + 1 < depth:
+            nested = block.add_blockref(f"CABINET_{level + 1}", (1, 1), dxfattribs={"rotation": 45, "xscale": 0.5, "yscale": 0.5})
+            for i, tag in enumerate(tags):
+                nested.add_attrib(tag, f"{level}.{i}", (1, 0.5 - 0.25 * i))
+    doc.blocks.new("EMPTY")
+    unused = doc.blocks.new("UNUSED")
+    unused.add_line((0, 0), (1, 1))
+
+    layers = [f"LAYER_{i}" for i in range(20)]
+    for i in range(entities):
+        x, y = rnd.uniform(0, extent), rnd.uniform(0, extent)
+        add_primitive(msp, primitive_types[i % len(primitive_types)], i, x, y, {"layer": layers[i % len(layers)]})
+    for i in range(inserts):
+        x, y = rnd.uniform(0, extent), rnd.uniform(0, extent)
+        scale = rnd.choice((0.5, 1.0, 2.0))
+        insert = msp.add_blockref("CABINET_0", (x, y), dxfattribs={
+            "layer": "CABINETS", "rotation": rnd.choice((0, 90, 180, 270, 30)), "xscale": scale, "yscale": scale})
+        for j, tag in enumerate(tags):
+            insert.add_attrib(tag, f"{i}.{j}", (x, y - 0.5 * (j + 1)), dxfattribs={"height": 0.25})
+    msp.add_blockref("EMPTY", (0, 0))
+    return doc
@@ -0,0 +1,126 @@
+def inserted_block_names(entities):
+    """Names of the blocks inserted by the entities, in drawing order without duplicates."""
+    return list(dict.fromkeys(entity.dxf.name for entity in entities if entity.dxftype() == "INSERT"))
+
+
+def scan_blocks(blocks):
+    """Collects the inserted block names and the entity count of every block in one pass."""
+    inserts = {}
+    entity_counts = {}
+    for block in blocks:
+        inserted = {}
+        count = 0
+        for entity in block:
+            count += 1
+            if entity.dxftype() == "INSERT":
+                inserted[entity.dxf.name] = None
+        inserts[block.name] = list(inserted)
+        entity_counts[block.name] = count
+    return inserts, entity_counts
+
+
+class BlockGraph:
+    """
+    Block dependency graph of a DXF document: which blocks every block (and the modelspace) inserts,
+    and how many entities each block contains.
+
+    - BLOCK use can be recursive: INSERT entities can use a BLOCK inside a BLOCK definition
+    - a BLOCK definition cannot contain another BLOCK definitions
+
+    The graph is built in a single scan over the BLOCKS section, which includes the modelspace itself.
+    Blocks are reachable when they are inserted, directly or through any depth of nested INSERTs, from the
+    modelspace. Unreachable blocks can be pruned before any entity is extracted.
+    """
+
+    def __init__(self, root_inserts, inserts, entity_counts):
+        self.root_inserts = root_inserts  # block names inserted by the modelspace
+        self.inserts = inserts  # block name -> inserted block names, in drawing order without duplicates
+        self.entity_counts = entity_counts  # block name -> number of entities (INSERTs included)
+
+    @classmethod
+    def from_document(cls, doc):
+        inserts, entity_counts = scan_blocks(doc.blocks)
+        return cls(inserts.get(doc.modelspace().block_record.dxf.name, []), inserts, entity_counts)
+
+    @classmethod
+    def from_entities(cls, top_level_entities, blocks):
+        inserts, entity_counts = scan_blocks(blocks)
+        return cls(inserted_block_names(top_level_entities), inserts, entity_counts)
+
+    def empty_blocks(self):
+        """
+        Blocks without entities, in drawing order. Blocks that only insert empty blocks are empty as well:
+        those INSERTs are dropped from the output, which leaves nothing to draw.
+        """
+        empty = {name for name, count in self.entity_counts.items() if count == 0}
+        changed = True
+        while changed:
+            changed = False
+            for name, inserted in self.inserts.items():
+                if name not in empty and inserted and len(inserted) == self.entity_counts[name] and all(n in empty for n in inserted):
+                    empty.add(name)
+                    changed = True
+        return [name for name in self.inserts if name in empty]
+
+    def dependencies(self, name=None):
+        """All blocks that are inserted by the given block (default: the modelspace), directly or nested."""
+        found = set()
+        stack = list(self.inserts.get(name, ()) if name is not None else self.root_inserts)
+        while stack:
+            inserted = stack.pop()
+            if inserted not in found:
+                found.add(inserted)
+                stack.extend(self.inserts.get(inserted, ()))
+        return found
+
+    def reachable_blocks(self):
+        """The defined blocks that are used by the modelspace, directly or through nested INSERTs."""
+        return {name for name in self.dependencies() if name in self.inserts}
+
+    def unused_blocks(self):
+        """All blocks (the modelspace and paperspace layouts included) that are never drawn from the modelspace."""
+        return set(self.inserts) - self.reachable_blocks()
+
+    def dependency_order(self):
+        """The reachable blocks ordered so that every block comes after all blocks it inserts."""
+        ordered = []
+        visited = set()
+
+        def visit(name):
+            visited.add(name)  # marked before the children, so a (broken) cyclic drawing terminates
+            for inserted in self.inserts.get(name, ()):
+                if inserted not in visited and inserted in self.inserts:
+                    visit(inserted)
+            ordered.append(name)
+
+        for name in self.root_inserts:
+            if name not in visited and name in self.inserts:
+                visit(name)
+        return ordered
+
+    def to_dict(self):
+        return {
+            "modelspace_inserts": self.root_inserts,
+            "blocks": {
+                name: {"entities": self.entity_counts[name], "inserts": self.inserts[name]}
+                for name in self.inserts
+            },
+            "empty": self.empty_blocks(),
+            "unused": sorted(self.unused_blocks()),
+        }
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import ezdxf
+
+    parser = argparse.ArgumentParser(description="Prints the block dependency graph of a DXF file as JSON.")
+    parser.add_argument("dxf_file")
+    args = parser.parse_args(argv)
+    graph = BlockGraph.from_document(ezdxf.readfile(args.dxf_file))
+    print(json.dumps(dict(graph.to_dict(), dependency_order=graph.dependency_order()), indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Bounding boxes of converted entities, as (min_x, min_y, max_x, max_y) tuples.
+
+The converter stores them in the records (see add_bboxes): every entity gets its box in a 'bbox' entry, block
+entities in block coordinates, and every BLOCK record the box of its whole block. entity_bbox returns the stored
+box when there is one, so the renderers and the spatial index only compute boxes for older conversions.
+"""
+import math
+
+import numpy as np
+
+from transform import Affine, NUMPY_MIN_POINTS
+
+POINT_TYPES = ('POINT', 'TEXT')
+MULTI_POINT_TYPES = ('LINE', 'POLYLINE', 'LWPOLYLINE', 'SOLID')
+QUADRANT_POINTS = ((1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0))
+
+
+def points_bbox(points):
+    if len(points) > NUMPY_MIN_POINTS:
+        array = np.asarray(points, dtype=float)
+        min_x, min_y = array.min(axis=0)
+        max_x, max_y = array.max(axis=0)
+        return float(min_x), float(min_y), float(max_x), float(max_y)
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def merge_bboxes(bboxes):
+    bboxes = [bbox for bbox in bboxes if bbox is not None]
+    if not bboxes:
+        return None
+    return (min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+            max(b[2] for b in bboxes), max(b[3] for b in bboxes))
+
+
+def transform_bbox(bbox, transform):
+    """Bounding box of the transformed corners of bbox."""
+    min_x, min_y, max_x, max_y = bbox
+    return points_bbox(transform.apply([(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)]))
+
+
+def arc_bbox(x, y, radius, start_angle, end_angle):
+    """Bounding box of a counterclockwise arc (angles in degrees): its end points and the quadrant points it passes."""
+    start = start_angle % 360.0
+    sweep = (end_angle - start_angle) % 360.0 or 360.0
+    xs = [x + radius * math.cos(math.radians(start)), x + radius * math.cos(math.radians(start + sweep))]
+    ys = [y + radius * math.sin(math.radians(start)), y + radius * math.sin(math.radians(start + sweep))]
+    # the points at the multiples of 90 degrees within the sweep, exactly
+    quadrant = math.ceil(start / 90.0)
+    while quadrant * 90.0 <= start + sweep:
+        dx, dy = QUADRANT_POINTS[quadrant % 4]
+        xs.append(x + radius * dx)
+        ys.append(y + radius * dy)
+        quadrant += 1
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def entity_bbox(entity, block_bboxes):
+    """
+    Bounding box of an entity, the stored 'bbox' when the converter added it; an INSERT covers the transformed
+    bounding box of its block and its ATTRIBs. Returns None for entities without geometry.
+    """
+    bbox = entity.get('bbox')
+    if bbox is not None:
+        return bbox
+    dxftype = entity['type']
+    if 'coordinates' not in entity:
+        return None
+    if dxftype in POINT_TYPES:
+        x, y = entity['coordinates']
+        return x, y, x, y
+    if dxftype in MULTI_POINT_TYPES:
+        return points_bbox(entity['coordinates']) if entity['coordinates'] else None
+    if dxftype == 'CIRCLE':
+        x, y = entity['coordinates']
+        r = entity.get('radius', 0.0)
+        return x - r, y - r, x + r, y + r
+    if dxftype == 'ARC':
+        x, y = entity['coordinates']
+        return arc_bbox(x, y, entity.get('radius', 0.0), entity.get('start_angle', 0.0), entity.get('end_angle', 360.0))
+    if dxftype == 'INSERT':
+        x, y = entity['coordinates']
+        bboxes = [(x, y, x, y)]
+        block_bbox = block_bboxes.get(entity['name'])
+        if block_bbox is not None:
+            bboxes.append(transform_bbox(block_bbox, Affine.from_entity(entity)))
+        for attrib in entity.get('attribs', ()):
+            ax, ay = attrib['coordinates']
+            bboxes.append((ax, ay, ax, ay))
+        return merge_bboxes(bboxes)
+    return None
+
+
+def store_bbox(entity, block_bboxes):
+    """Computes the bounding box of an entity and stores it in its 'bbox' entry (if it has geometry)."""
+    bbox = entity_bbox(entity, block_bboxes)
+    if bbox is not None:
+        entity['bbox'] = list(bbox)
+    return bbox
+
+
+def block_bbox(block_entities, block_bboxes, store=False):
+    """
+    Bounding box of a block definition in its own coordinates; nested blocks must be in block_bboxes already.
+    With store the boxes of the block entities are stored in them.
+    """
+    if store:
+        return merge_bboxes([store_bbox(entity, block_bboxes) for entity in block_entities])
+    return merge_bboxes([entity_bbox(entity, block_bboxes) for entity in block_entities])
+
+
+def compute_block_bboxes(blocks, store=False, known=None):
+    """
+    Bounding boxes of all blocks ({name: entities}), nested blocks are computed before the blocks inserting them.
+    known: boxes of other blocks that are already computed, they are included in the result.
+    """
+    block_bboxes = dict(known) if known else {}
+
+    def visit(name, visiting):
+        if name in block_bboxes or name not in blocks or name in visiting:
+            return
+        visiting.add(name)
+        for entity in blocks[name]:
+            if entity['type'] == 'INSERT':
+                visit(entity['name'], visiting)
+        block_bboxes[name] = block_bbox(blocks[name], block_bboxes, store)
+
+    for name in blocks:
+        visit(name, set())
+    return block_bboxes
+
+
+def add_bboxes(records):
+    """
+    Passes the records of a conversion through with their bounding boxes stored (see the module docstring).
+    The box of a block depends on the boxes of the blocks it inserts, so a BLOCK record is passed on as soon as
+    those are known: right away when nested blocks come first, as dxf2model yields them. Blocks that insert
+    blocks which did not come yet (e.g. in other orders, or undefined blocks) are held back until the first
+    other record.
+    """
+    block_bboxes = {}
+    pending = []  # BLOCK records waiting for the boxes of the blocks they insert
+    for item in records:
+        if item['type'] == 'BLOCK':
+            pending.append(item)
+            yield from _store_ready_blocks(pending, block_bboxes)
+            continue
+        if pending:
+            _store_block_bboxes(pending, block_bboxes)
+            yield from pending
+            pending = []
+        store_bbox(item, block_bboxes)
+        yield item
+    if pending:
+        _store_block_bboxes(pending, block_bboxes)
+        yield from pending
+
+
+def _store_block_bbox(item, block_bboxes):
+    bbox = block_bbox(item['entities'], block_bboxes, store=True)
+    block_bboxes[item['block_name']] = bbox
+    if bbox is not None:
+        item['bbox'] = list(bbox)
+
+
+def _store_ready_blocks(pending, block_bboxes):
+    """Stores the boxes of the pending BLOCK records whose inserted blocks all have theirs, and returns those records."""
+    ready = []
+    progress = True
+    while progress:
+        progress = False
+        for item in list(pending):
+            if all(entity['name'] in block_bboxes for entity in item['entities'] if entity['type'] == 'INSERT'):
+                _store_block_bbox(item, block_bboxes)
+                pending.remove(item)
+                ready.append(item)
+                progress = True
+    return ready
+
+
+def _store_block_bboxes(block_records, block_bboxes):
+    """Stores the boxes of the BLOCK records in any order (nested blocks first), adds them to block_bboxes."""
+    block_bboxes.update(compute_block_bboxes({item['block_name']: item['entities'] for item in block_records},
+                                             store=True, known=block_bboxes))
+    for item in block_records:
+        bbox = block_bboxes.get(item['block_name'])
+        if bbox is not None:
+            item['bbox'] = list(bbox)
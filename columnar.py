@@ -0,0 +1,152 @@
+"""
+Columnar geometry output: one table per DXF type, with the coordinates of all entities of a type in one
+contiguous float64 array.
+
+A model is written as a directory with a manifest.json and one .npy file per column, e.g.
+
+    dxf_entities.columns/
+        manifest.json
+        LINE.id.npy  LINE.layer.npy  LINE.block.npy  LINE.coordinates.npy  LINE.offsets.npy
+        ...
+
+coordinates is a (points, 2) array. For the types with several points per entity (LINE, POLYLINE, LWPOLYLINE,
+SOLID) the points of entity i are coordinates[offsets[i]:offsets[i + 1]], the other types have exactly one
+point per entity. block holds the name of the BLOCK an entity belongs to ('' for the modelspace). The ATTRIBs
+of INSERTs are stored in their own table, with the id of their INSERT in the insert_id column.
+
+Plain .npy files can be memory-mapped, so a model opens without reading the geometry.
+"""
+import json
+import os
+from array import array
+
+import numpy as np
+
+COMMON_COLUMNS = (("id", "U", ""), ("layer", "U", ""), ("block", "U", ""))
+
+# DXF type -> (has several points per entity, extra columns as (name, kind, default))
+TABLES = {
+    "POINT": (False, ()),
+    "LINE": (True, ()),
+    "POLYLINE": (True, (("is_closed", "?", False),)),
+    "LWPOLYLINE": (True, (("is_closed", "?", False),)),
+    "SOLID": (True, ()),
+    "CIRCLE": (False, (("radius", "f", 0.0),)),
+    "ARC": (False, (("radius", "f", 0.0), ("start_angle", "f", 0.0), ("end_angle", "f", 360.0))),
+    "TEXT": (False, (("text", "U", ""), ("height", "f", 0.0), ("rotation", "f", 0.0))),
+    "INSERT": (False, (("name", "U", ""), ("xscale", "f", 1.0), ("yscale", "f", 1.0), ("rotation", "f", 0.0))),
+    "ATTRIB": (False, (("insert_id", "U", ""), ("tag", "U", ""), ("text", "U", ""), ("height", "f", 0.0), ("rotation", "f", 0.0))),
+}
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ColumnarWriter:
+    """Collects records (BLOCK records included) into compact per-type columns and saves them as .npy files."""
+
+    def __init__(self):
+        self.tables = {}
+        self.skipped = {}
+
+    def table(self, dxftype):
+        table = self.tables.get(dxftype)
+        if table is None:
+            multi_point, extra_columns = TABLES[dxftype]
+            table = {"coordinates": array("d"), "count": 0}
+            if multi_point:
+                table["offsets"] = array("q", [0])
+            for name, kind, _ in COMMON_COLUMNS + extra_columns:
+                table[name] = array("d") if kind == "f" else []
+            self.tables[dxftype] = table
+        return table
+
+    def add(self, record, block=""):
+        dxftype = record["type"]
+        if dxftype == "BLOCK":
+            for entity in record["entities"]:
+                self.add(entity, record["block_name"])
+            return
+        if dxftype not in TABLES or "coordinates" not in record:
+            self.skipped[dxftype] = self.skipped.get(dxftype, 0) + 1
+            return
+
+        table = self.table(dxftype)
+        multi_point, extra_columns = TABLES[dxftype]
+        coordinates = table["coordinates"]
+        if multi_point:
+            for x, y in record["coordinates"]:
+                coordinates.append(x)
+                coordinates.append(y)
+            table["offsets"].append(len(coordinates) // 2)
+        else:
+            x, y = record["coordinates"]
+            coordinates.append(x)
+            coordinates.append(y)
+        table["count"] += 1
+
+        table["id"].append(record["id"])
+        table["layer"].append(record.get("layer", ""))
+        table["block"].append(block)
+        for name, kind, default in extra_columns:
+            value = record.get(name, default)
+            table[name].append(float(value) if kind == "f" else value)
+
+        for attrib in record.get("attribs", ()):
+            self.add(dict(attrib, insert_id=record["id"]), block)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        manifest = {"tables": {}, "skipped": self.skipped}
+        for dxftype, table in self.tables.items():
+            multi_point, extra_columns = TABLES[dxftype]
+            columns = {"coordinates": np.frombuffer(table["coordinates"], dtype=np.float64).reshape(-1, 2)}
+            if multi_point:
+                columns["offsets"] = np.frombuffer(table["offsets"], dtype=np.int64)
+            for name, kind, _ in COMMON_COLUMNS + extra_columns:
+                if kind == "U":
+                    columns[name] = np.array(table[name], dtype=str) if table[name] else np.zeros(0, dtype="U1")
+                elif kind == "?":
+                    columns[name] = np.array(table[name], dtype=bool)
+                else:
+                    columns[name] = np.frombuffer(table[name], dtype=np.float64)
+            for name, column in columns.items():
+                np.save(os.path.join(path, f"{dxftype}.{name}.npy"), column)
+            manifest["tables"][dxftype] = {"count": table["count"], "columns": list(columns)}
+        with open(os.path.join(path, MANIFEST_FILE), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+
+
+def write_columnar(records, path):
+    writer = ColumnarWriter()
+    for record in records:
+        writer.add(record)
+    writer.save(path)
+
+
+def load_columnar(path, mmap=True, types=None, columns=None):
+    """
+    Opens a columnar model as {dxftype: {column: array}}. With mmap the arrays are memory-mapped and only the
+    pages that are actually used are read from disk. types and columns restrict what is opened,
+    e.g. columns=("layer", "coordinates", "offsets") for geometry and layers only.
+    """
+    with open(os.path.join(path, MANIFEST_FILE)) as manifest_file:
+        manifest = json.load(manifest_file)
+    mmap_mode = "r" if mmap else None
+    model = {}
+    for dxftype, table in manifest["tables"].items():
+        if types is not None and dxftype not in types:
+            continue
+        model[dxftype] = {
+            name: np.load(os.path.join(path, f"{dxftype}.{name}.npy"), mmap_mode=mmap_mode)
+            for name in table["columns"]
+            if columns is None or name in columns
+        }
+    return model
+
+
+def entity_points(table, index):
+    """The (n, 2) coordinates of one entity of a table."""
+    if "offsets" in table:
+        offsets = table["offsets"]
+        return table["coordinates"][offsets[index]:offsets[index + 1]]
+    return table["coordinates"][index:index + 1]
@@ -0,0 +1,148 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+DEFAULT_CACHE_DIR = ".dxf_cache"
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024  # 1 GB
+META_FILE = "meta.json"
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of the file contents, read in chunks so large plans are never fully loaded."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_output(source, destination):
+    """Copies an output file or output directory (e.g. the columnar arrays)."""
+    if os.path.isdir(source):
+        shutil.copytree(source, destination, dirs_exist_ok=True)
+    else:
+        shutil.copyfile(source, destination)
+
+
+class ConversionCache:
+    """
+    On-disk cache of converted DXF files.
+
+    An entry is keyed by the hash of the DXF bytes, the converter version and the conversion options,
+    and holds the produced output files plus a meta.json with the conversion stats. The modification
+    time of meta.json is the last access time: when the cache grows beyond max_size the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def key(self, dxf_file, converter_version, options=None):
+        options = json.dumps(options or {}, sort_keys=True)
+        digest = hashlib.sha256(f"{file_digest(dxf_file)}|{converter_version}|{options}".encode())
+        return digest.hexdigest()
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, key, output_dir):
+        """Copies the cached output files of key into output_dir and returns the cached stats, or None on a miss."""
+        entry = self.entry_dir(key)
+        meta_path = os.path.join(entry, META_FILE)
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            os.makedirs(output_dir, exist_ok=True)
+            for name in meta["files"]:
+                copy_output(os.path.join(entry, name), os.path.join(output_dir, name))
+            os.utime(meta_path)  # mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        return meta["stats"]
+
+    def store(self, key, output_dir, files, stats):
+        """Adds the output files of a conversion to the cache and evicts old entries when the cache is too large."""
+        entry = self.entry_dir(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # build the entry next to its final location and move it in place, so parallel writers never see half an entry
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry))
+        try:
+            for name in files:
+                copy_output(os.path.join(output_dir, name), os.path.join(tmp_dir, name))
+            with open(os.path.join(tmp_dir, META_FILE), "w") as meta_file:
+                json.dump({"files": list(files), "stats": stats, "created": time.time()}, meta_file)
+            os.replace(tmp_dir, entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """Lists (last access time, size in bytes, path) for every cache entry."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for prefix in os.scandir(self.cache_dir):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                meta_path = os.path.join(entry.path, META_FILE)
+                if entry.name.startswith(".tmp-") or not os.path.exists(meta_path):
+                    continue
+                size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(entry.path) for name in names)
+                entries.append((os.stat(meta_path).st_mtime, size, entry.path))
+        return entries
+
+    def evict(self, max_size=None):
+        """Removes the least recently used entries until the cache fits in max_size; returns the number removed."""
+        max_size = self.max_size if max_size is None else max_size
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "cache_dir": os.path.abspath(self.cache_dir),
+            "entries": len(entries),
+            "size": sum(size for _, size, _ in entries),
+            "max_size": self.max_size,
+            "oldest_access": min((t for t, _, _ in entries), default=None),
+            "newest_access": max((t for t, _, _ in entries), default=None),
+        }
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspects and maintains the DXF conversion cache.")
+    parser.add_argument("command", choices=["stats", "evict", "clear"])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--max-size", type=float, default=DEFAULT_MAX_SIZE / (1024 * 1024), help="maximum cache size in MB")
+    args = parser.parse_args(argv)
+
+    cache = ConversionCache(args.cache_dir, int(args.max_size * 1024 * 1024))
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=4))
+    elif args.command == "evict":
+        print(f"Evicted {cache.evict()} entries")
+    elif args.command == "clear":
+        cache.clear()
+        print(f"Cleared {args.cache_dir}")
+
+
+if __name__ == '__main__':
+    main()
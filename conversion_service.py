@@ -0,0 +1,376 @@
+"""
+Long-running conversion service: a local HTTP server (on a TCP port or a Unix socket) in front of a pool of
+worker processes that have imported ezdxf and the converter and converted a small drawing before the first
+request, so a request only pays for its own conversion.
+
+    python conversion_service.py --port 8765 -j 4
+    curl --data-binary @plan.dxf 'http://127.0.0.1:8765/convert?format=svg' -o plan.svg
+    curl --data-binary @plan.dxf 'http://127.0.0.1:8765/convert?format=jsonl&layer=SIGN*&explode=1'
+    curl -H 'Content-Type: application/json' -d '{"path": "/plans/plan.dxf"}' 'http://127.0.0.1:8765/convert'  # with --allow-paths
+
+POST /convert takes the DXF file as the request body (or {"path": ...} as JSON) and returns it converted to
+jsonl (default), json or svg. Query parameters: format, explode, the filters of dxf2model (layer, exclude_layer,
+type, exclude_type, block, exclude_block, bbox=min_x,min_y,max_x,max_y) and for svg: symbols=0, precision.
+GET /health reports the pool and its queue.
+
+At most workers conversions run at the same time and at most max_queue requests wait for a worker, further
+requests are refused with 503. A request that takes longer than the timeout is answered with 504; its worker
+finishes the conversion (and keeps its slot) before it takes the next one.
+"""
+import argparse
+import os
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import serializer
+
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_MAX_UPLOAD = 256 * 1024 * 1024
+
+CONTENT_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "json": "application/json",
+    "svg": "image/svg+xml",
+}
+FILTER_PARAMETERS = ("layer", "exclude_layer", "type", "exclude_type", "block", "exclude_block")
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def warm_up():
+    """Worker initializer: imports the converter and renderer and converts a small drawing with every exported type."""
+    import ezdxf
+    import data2svg
+    import dxf2model
+    from render_model import RenderModel
+
+    doc = ezdxf.new("R12")
+    block = doc.blocks.new("WARM_UP")
+    block.add_line((0, 0), (1, 0))
+    block.add_attdef("TAG", (0, 1), dxfattribs={"height": 1})
+    msp = doc.modelspace()
+    msp.add_point((0, 0))
+    msp.add_line((0, 0), (1, 1))
+    msp.add_circle((0, 0), 1)
+    msp.add_arc((0, 0), 1, 0, 90)
+    msp.add_text("warm up", height=1)
+    msp.add_solid([(0, 0), (1, 0), (0, 1)])
+    msp.add_polyline2d([(0, 0), (1, 1), (2, 0)])
+    msp.add_blockref("WARM_UP", (2, 2)).add_attrib("TAG", "1", (2, 3))
+    records = [serializer.loads(serializer.dumpb(record)) for record in dxf2model.iter_document(doc, [], [])]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model = RenderModel.from_records(records)
+        data2svg.render(model, os.path.join(temp_dir, "warm_up.svg"), writer="stream")
+
+
+def ping():
+    return os.getpid()
+
+
+def run_job(dxf_file, output_format, explode=False, filter_options=None, use_symbols=True, precision=None):
+    """Converts a DXF file in a worker and returns the output as bytes with the number of converted records."""
+    import dxf2model
+    from bounds import add_bboxes
+
+    entity_filter = None
+    if filter_options:
+        from entity_filter import EntityFilter
+        entity_filter = EntityFilter(**filter_options)
+
+    if output_format == "svg":
+        import data2svg
+        model = dxf2model.convert_model(dxf_file, entity_filter, explode)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            svg_file = os.path.join(temp_dir, "output.svg")
+            data2svg.render(model, svg_file, use_symbols, writer="stream", precision=precision)
+            with open(svg_file, "rb") as f:
+                return f.read(), len(model.blocks) + len(model.entities)
+
+    records = dxf2model.load_records(dxf_file, entity_filter=entity_filter)
+    if explode:
+        from explode import explode_records
+        records = explode_records(records)
+    records = add_bboxes(records)
+    lines = [serializer.dumpb(record) for record in records]
+    if output_format == "json":
+        return b"[" + b",".join(lines) + b"]", len(lines)
+    return b"".join(line + b"\n" for line in lines), len(lines)
+
+
+class ConversionService:
+    def __init__(self, workers=None, max_queue=DEFAULT_MAX_QUEUE, timeout=DEFAULT_TIMEOUT,
+                 max_upload=DEFAULT_MAX_UPLOAD, allow_paths=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_upload = max_upload
+        self.allow_paths = allow_paths
+        # a slot is held from the submission of a job until its worker is done with it, timed out jobs included
+        self.slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+        self.executor = self._start_pool()
+
+    def _start_pool(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        # start and warm up all workers now instead of on the first requests
+        for future in [executor.submit(ping) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def _release(self, future):
+        try:
+            with self._lock:
+                self.pending -= 1
+                if future.cancelled():
+                    self.cancelled += 1  # timed out while still in the queue
+                elif future.exception() is None:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+        finally:
+            self.slots.release()
+
+    def submit(self, func, *args, cleanup=None):
+        """
+        Runs func in a worker and returns its result. Raises ServiceBusy when the queue is full and TimeoutError
+        when the result takes longer than the timeout. cleanup is called once the worker is done with the job
+        (or it was cancelled), e.g. to remove an upload that a timed out job still reads.
+        """
+        if not self.slots.acquire(blocking=False):
+            if cleanup is not None:
+                cleanup()
+            raise ServiceBusy(f"all {self.workers} workers are busy and {self.max_queue} requests are waiting")
+        with self._lock:
+            self.pending += 1
+            executor = self.executor
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                self.pending -= 1
+            self.slots.release()
+            if cleanup is not None:
+                cleanup()
+            self._restart(executor)
+            raise
+        future.add_done_callback(self._release)
+        if cleanup is not None:
+            future.add_done_callback(lambda _: cleanup())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()  # still waiting in the queue: drop it
+            raise
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+
+    def _restart(self, broken):
+        """Replaces a pool whose worker died (e.g. killed for its memory use) for the next requests."""
+        with self._lock:
+            if self.executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._start_pool()
+
+    def health(self):
+        with self._lock:
+            return {
+                "status": "ok",
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+            }
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def filter_options(query):
+    """The EntityFilter arguments from the query parameters, None when there are none."""
+    # ?layer=A&layer=B* gives EntityFilter(layers=["A", "B*"])
+    options = {name + "s": query[name] for name in FILTER_PARAMETERS if name in query}
+    if "bbox" in query:
+        try:
+            bbox = [float(value) for value in query["bbox"][0].split(",")]
+        except ValueError:
+            bbox = []
+        if len(bbox) != 4:
+            raise RequestError(400, "bbox must be min_x,min_y,max_x,max_y")
+        options["bbox"] = bbox
+    return options or None
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "DXFConversionService/1"
+    protocol_version = "HTTP/1.1"
+    # False while the body of a POST request is not read yet
+    body_read = True
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if not self.body_read:
+            # an error before the body was read: the unread body must not be parsed as the next request
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, obj):
+        self.send_body(status, serializer.dumpb(obj), CONTENT_TYPES["json"])
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/health":
+            self.send_json(200, self.service.health())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.body_read = False
+        url = urlsplit(self.path)
+        if url.path != "/convert":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            query = parse_qs(url.query)
+            output_format = query.get("format", ["jsonl"])[0]
+            if output_format not in CONTENT_TYPES:
+                raise RequestError(400, f"format must be one of {', '.join(CONTENT_TYPES)}")
+            explode = query.get("explode", ["0"])[0] in ("1", "true")
+            use_symbols = query.get("symbols", ["1"])[0] not in ("0", "false")
+            try:
+                precision = int(query["precision"][0]) if "precision" in query else None
+            except ValueError:
+                raise RequestError(400, "precision must be an integer")
+            options = filter_options(query)
+            dxf_file, upload = self.read_dxf()
+            # the upload is removed once the worker is done with it, which can be after a timeout
+            cleanup = partial(shutil.rmtree, upload, ignore_errors=True) if upload else None
+            start = time.perf_counter()
+            body, records = self.service.submit(run_job, dxf_file, output_format, explode, options, use_symbols, precision,
+                                                cleanup=cleanup)
+            self.send_body(200, body, CONTENT_TYPES[output_format], {
+                "X-Records": str(records),
+                "X-Conversion-Seconds": f"{time.perf_counter() - start:.3f}",
+            })
+        except RequestError as e:
+            self.send_json(e.status, {"error": str(e)})
+        except ServiceBusy as e:
+            self.send_json(503, {"error": str(e)})
+        except TimeoutError:
+            self.send_json(504, {"error": f"the conversion took longer than {self.service.timeout}s"})
+        except Exception as e:
+            self.log_error("conversion failed: %s", traceback.format_exc())
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def read_dxf(self):
+        """The DXF file of the request: the uploaded body in a temporary directory, or a path for --allow-paths."""
+        if "Content-Length" not in self.headers:
+            raise RequestError(411, "Content-Length is required")
+        try:
+            length = int(self.headers["Content-Length"])
+        except ValueError:
+            raise RequestError(400, "Content-Length must be an integer")
+        if length > self.service.max_upload:
+            raise RequestError(413, f"the upload is larger than {self.service.max_upload} bytes")
+        body = self.rfile.read(length)
+        self.body_read = True
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            if not self.service.allow_paths:
+                raise RequestError(403, "converting files by path is not enabled (--allow-paths)")
+            try:
+                path = serializer.loads(body).get("path")
+            except (ValueError, AttributeError):  # malformed JSON, or not an object
+                raise RequestError(400, "the request body must be a JSON object with a path")
+            if not path or not os.path.isfile(path):
+                raise RequestError(400, f"no such file: {path}")
+            return path, None
+        if not body:
+            raise RequestError(400, "the request body must be a DXF file")
+        upload = tempfile.mkdtemp(prefix="dxf-service-")
+        dxf_file = os.path.join(upload, "upload.dxf")
+        with open(dxf_file, "wb") as f:
+            f.write(body)
+        return dxf_file, upload
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, ServiceHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serves DXF conversions to JSON, JSONL and SVG from a pool of warm worker processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="listen on this Unix socket instead of a TCP port")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes, the number of concurrent conversions (default: number of cores)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="requests that may wait for a worker before new ones are refused")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds before a request is answered with 504")
+    parser.add_argument("--max-upload", type=float, default=DEFAULT_MAX_UPLOAD / (1024 * 1024), help="maximum DXF upload in MB")
+    parser.add_argument("--allow-paths", action="store_true", help="also convert files on this machine by path")
+    args = parser.parse_args(argv)
+
+    service = ConversionService(args.workers, args.max_queue, args.timeout, int(args.max_upload * 1024 * 1024), args.allow_paths)
+    server = make_server(service, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving conversions on {where} with {service.workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
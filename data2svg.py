@@ -1,236 +1,373 @@
-import json
+import re
 import svgwrite
 import math  # Import math for trigonometric functions like cos and sin
 from collections import defaultdict
+from contextlib import nullcontext
+from time import perf_counter
 
-DEFAULT_STROKE_WIDTH = 0.1
-
-def get_min_max_coordinates(entities):
-    """Helper function to calculate the min and max coordinates for estimating viewport size."""
-    min_x, min_y = float('inf'), float('inf')
-    max_x, max_y = float('-inf'), float('-inf')
-
-    def update_min_max(coords):
-        nonlocal min_x, min_y, max_x, max_y
-        for x, y in coords:
-            min_x = min(min_x, x)
-            min_y = min(min_y, y)
-            max_x = max(max_x, x)
-            max_y = max(max_y, y)
-
-    for entity in entities:
-        if entity['type'] in ['POINT', 'LINE', 'POLYLINE', 'SOLID', 'CIRCLE', 'ARC', 'TEXT']:
-            if entity['type'] in ['POINT', 'CIRCLE', 'ARC', 'TEXT']:
-                update_min_max([entity['coordinates']])
-            elif entity['type'] in ['LINE', 'POLYLINE', 'SOLID']:
-                update_min_max(entity['coordinates'])
-
-    # Check if min_x or max_x are still at inf or -inf
-    if min_x == float('inf') or max_x == float('-inf'):
-        # Fallback to default values if no valid coordinates were found
-        min_x, min_y, max_x, max_y = 0, 0, 100, 100
-
-    return min_x, min_y, max_x, max_y
+import metrics as instrumentation
+from metrics import EntityTimer
+from render_model import RenderModel, default_cache_file
+from transform import Affine
 
-
-def draw_entities(entities, svg_group, blocks, dwg):
-    """Draws entities (points, lines, polylines, etc.) onto the SVG group."""
-    
+DEFAULT_STROKE_WIDTH = 0.1
+# view box of a plan without geometry
+DEFAULT_BOUNDS = (0, 0, 100, 100)
+# font size of TEXT entities without a height (the DXF default)
+DEFAULT_TEXT_HEIGHT = 2.5
+
+def draw_entities(entities, svg_group, blocks, dwg, use_symbols = False, timer = None, inserts = None):
+    """
+    Draws entity records (points, lines, polylines, etc., see entity_model) onto the SVG group with the handler of their type in DRAW_HANDLERS,
+    INSERTs as <use> of their symbol with use_symbols, otherwise with all their (nested) block entities.
+    With an EntityTimer the drawing time is collected per entity type.
+    """
+    if inserts is None and not use_symbols:
+        inserts = InsertRenderer(blocks)
     for entity in entities:
-        if entity['type'] == 'POINT':
-            draw_point(entity, svg_group, dwg)
-        elif entity['type'] == 'LINE':
-            draw_line(entity, svg_group, dwg)
-        elif entity['type'] == 'POLYLINE':
-            draw_polyline(entity, svg_group, dwg)
-        elif entity['type'] == 'SOLID':
-            draw_solid(entity, svg_group, dwg)
-        elif entity['type'] == 'CIRCLE':
-            draw_circle(entity, svg_group, dwg)
-        elif entity['type'] == 'ARC':
-            draw_arc(entity, svg_group, dwg)
-        elif entity['type'] == 'TEXT':
-            draw_text(entity, svg_group, dwg)
-        elif entity['type'] == 'INSERT':
-            draw_insert(entity, svg_group, blocks, dwg)
-
-def draw_point(entity, svg_group, dwg):
-    x, y = entity['coordinates']
+        if timer is not None:
+            start = perf_counter()
+        dxftype = entity.type
+        if dxftype == 'INSERT':
+            if use_symbols:
+                draw_insert_use(entity, svg_group, blocks, dwg)
+            else:
+                inserts.draw(entity, svg_group, dwg)
+        else:
+            handler = DRAW_HANDLERS.get(dxftype)
+            if handler is not None:
+                handler(entity, svg_group, dwg)
+        if timer is not None:
+            timer.add(dxftype, perf_counter() - start)
+
+def number_format(dwg):
+    """
+    The function that formats the numbers of the path, transform and viewBox strings: rounded to the precision of
+    the streaming writer (see svg_writer.StreamingDrawing.fmt), str for svgwrite.
+    """
+    return getattr(dwg, 'fmt', str)
+
+def draw_point(entity, svg_group, dwg, transform = None):
+    x, y = transform.apply_point(entity.coordinates) if transform else entity.coordinates
     svg_group.add(dwg.circle(center=(x, y), r=2, fill="black", stroke_width=DEFAULT_STROKE_WIDTH))
 
 def draw_line(entity, svg_group, dwg, transform = None):
     if transform:
-        start = transform_point(entity['coordinates'][0], transform['scale'], transform['rotation'], transform['translation'])
-        end = transform_point(entity['coordinates'][1], transform['scale'], transform['rotation'], transform['translation'])
+        start, end = transform.apply_packed(entity.coordinates)
     else:
-        start = entity['coordinates'][0]
-        end = entity['coordinates'][1]
+        start, end = entity.points()
     svg_group.add(dwg.line(start=start, end=end, stroke="black", stroke_width=DEFAULT_STROKE_WIDTH))
 
 def draw_polyline(entity, svg_group, dwg, transform = None):
+    """Draws a POLYLINE or an LWPOLYLINE (the converter exports both with their vertices and is_closed)."""
     if transform:
-        positions = [transform_point(coords, transform['scale'],  transform['rotation'], transform['translation']) for coords in entity['coordinates']]
+        points = [(x, y) for x, y in transform.apply_packed(entity.coordinates)]
     else:
-        positions = entity['coordinates']
-    points = [(x, y) for x, y in positions]
-    if entity['is_closed']:
+        points = entity.points()
+    if not points:
+        return
+    if entity.is_closed:
         points.append(points[0])  # Close the polyline
     svg_group.add(dwg.polyline(points=points, stroke="black", fill="none", stroke_width=DEFAULT_STROKE_WIDTH))
 
 def draw_solid(entity, svg_group, dwg, transform = None):
     if transform:
-        positions = [transform_point(coords, transform['scale'],  transform['rotation'], transform['translation']) for coords in entity['coordinates']]
+        points = [(x, y) for x, y in transform.apply_packed(entity.coordinates)]
     else:
-        positions = entity['coordinates']
-    points = [(x, y) for x, y in positions]
+        points = entity.points()
     svg_group.add(dwg.polygon(points=points, fill="gray", stroke_width=DEFAULT_STROKE_WIDTH))
 
 def draw_circle(entity, svg_group, dwg, transform = None):
+    radius = entity.radius
     if transform:
-        center = transform_point(entity['coordinates'], transform['scale'], transform['rotation'], transform['translation'])
-        radius = entity['radius'] * transform['scale'][0]  # Assuming uniform scaling
+        x, y = transform.apply_point(entity.coordinates)
+        x_scale, y_scale = transform.scale
+        if not math.isclose(x_scale, y_scale):
+            # a block scaled differently along x and y turns its circles into ellipses
+            fmt = number_format(dwg)
+            svg_group.add(dwg.ellipse(center=(x, y), r=(radius * x_scale, radius * y_scale), stroke="black", fill="none",
+                                      stroke_width=DEFAULT_STROKE_WIDTH, transform=f'rotate({fmt(transform.rotation)}, {fmt(x)}, {fmt(y)})'))
+            return
+        radius *= x_scale
     else:
-        center = entity['coordinates']
-        radius = entity['radius']
-    x, y = center
+        x, y = entity.coordinates
     svg_group.add(dwg.circle(center=(x, y), r=radius, stroke="black", fill="none", stroke_width=DEFAULT_STROKE_WIDTH))
 
 def draw_arc(entity, svg_group, dwg, transform = None):
+    """Draws a counterclockwise ARC; its end points are transformed, so mirrored blocks draw it clockwise."""
+    radius = entity.radius
+    start_angle = entity.start_angle if entity.start_angle is not None else 0.0
+    end_angle = entity.end_angle if entity.end_angle is not None else 360.0
+    sweep = (end_angle - start_angle) % 360.0
+    if sweep == 0.0:
+        draw_circle(entity, svg_group, dwg, transform)  # a full circle, which a single arc path cannot draw
+        return
+    cx, cy = entity.coordinates
+    start = [cx + radius * math.cos(math.radians(start_angle)), cy + radius * math.sin(math.radians(start_angle))]
+    end = [cx + radius * math.cos(math.radians(start_angle + sweep)), cy + radius * math.sin(math.radians(start_angle + sweep))]
+    rx = ry = radius
+    rotation = 0
+    sweep_flag = 1
     if transform:
-        center = transform_point(entity['coordinates'], transform['scale'], transform['rotation'], transform['translation'])
-        radius = entity['radius'] * transform['scale'][0]  # Assuming uniform scaling
-        start_angle = entity['start_angle'] + transform['rotation']
-        end_angle = entity['end_angle'] + transform['rotation']
-    else:
-        center = entity['coordinates']
-        radius = entity['radius']
-        start_angle = entity['start_angle']
-        end_angle = entity['end_angle']
-    x, y = [n for n in center]
-    # Approximate arc using path
-    start_x = x + radius * math.cos(math.radians(start_angle))
-    start_y = y + radius * math.sin(math.radians(start_angle))
-    end_x = x + radius * math.cos(math.radians(end_angle))
-    end_y = y + radius * math.sin(math.radians(end_angle))
-    
-    large_arc_flag = 1 if (end_angle - start_angle) > 180 else 0
-    
-    svg_group.add(dwg.path(d=f"M {start_x},{start_y} A {radius},{radius} 0 {large_arc_flag},1 {end_x},{end_y}",
+        start, end = transform.apply_point(start), transform.apply_point(end)
+        x_scale, y_scale = transform.scale
+        rx, ry = radius * x_scale, radius * y_scale
+        if not math.isclose(x_scale, y_scale):
+            rotation = transform.rotation  # of the ellipse axes
+        if transform.a * transform.d - transform.b * transform.c < 0:
+            sweep_flag = 0  # mirrored
+    large_arc_flag = 1 if sweep > 180 else 0
+
+    fmt = number_format(dwg)
+    svg_group.add(dwg.path(d=f"M {fmt(start[0])},{fmt(start[1])} A {fmt(rx)},{fmt(ry)} {fmt(rotation)} {large_arc_flag},{sweep_flag} {fmt(end[0])},{fmt(end[1])}",
                            stroke="black", fill="none", stroke_width=DEFAULT_STROKE_WIDTH))
 
 def draw_text(entity, svg_group, dwg, transform = None):
+    height = entity.height if entity.height is not None else DEFAULT_TEXT_HEIGHT
+    rotation = entity.rotation if entity.rotation is not None else 0
     if transform:
-        text_position = transform_point(entity['coordinates'], transform['scale'], transform['rotation'], transform['translation'])
+        text_position = transform.apply_point(entity.coordinates)
+        # like the <use> of a block symbol, the text turns and scales with the INSERT
+        rotation = float(rotation) + transform.rotation
+        height = float(height) * transform.scale[1]
     else:
-        text_position = entity['coordinates']
+        text_position = entity.coordinates
     x, y = text_position
-    text = entity['text']
-    rotation = entity.get('rotation', 0) 
+    text = entity.text
+    fmt = number_format(dwg)
     # in de transformatie hieronder is de volgorde van de rotate, scale en translate belangrijk!
-    svg_group.add(dwg.text(text, insert=(x, y), font_size=entity['height'], fill="black", transform=f'rotate({rotation}, {x}, {y}) scale(1, -1) translate(0, {-2 * y})'))
+    svg_group.add(dwg.text(text, insert=(x, y), font_size=height, fill="black", transform=f'rotate({fmt(rotation)}, {fmt(x)}, {fmt(y)}) scale(1, -1) translate(0, {fmt(-2 * y)})'))
+
 
+# DXF type -> function(entity, svg_group, dwg, transform = None) that draws it, for the modelspace, the block
+# symbols and the INSERTs drawn inline alike; types without a handler (e.g. ATTDEF) are not drawn
+DRAW_HANDLERS = {
+    'POINT': draw_point,
+    'LINE': draw_line,
+    'POLYLINE': draw_polyline,
+    'LWPOLYLINE': draw_polyline,
+    'SOLID': draw_solid,
+    'CIRCLE': draw_circle,
+    'ARC': draw_arc,
+    'TEXT': draw_text,
+}
 
-def transform_point(point, scale, rotation, translation):
-    """Transforms a point by scaling, rotating, and translating."""
-    # Apply scaling
-    x, y = point[0] * scale[0], point[1] * scale[1]
 
-    # Apply rotation
-    angle_rad = math.radians(rotation)
-    x_rot = x * math.cos(angle_rad) - y * math.sin(angle_rad)
-    y_rot = x * math.sin(angle_rad) + y * math.cos(angle_rad)
+def symbol_id(block_name):
+    """SVG id of the symbol of a block: characters that are not allowed in an XML id (e.g. in '*U12') are escaped."""
+    return 'block-' + re.sub(r'[^A-Za-z0-9.-]', lambda match: f'_{ord(match.group()):x}_', block_name)
 
-    # Apply translation
-    x_trans = x_rot + translation[0]
-    y_trans = y_rot + translation[1]
 
-    return [x_trans, y_trans]
+def define_symbols(blocks, dwg):
+    """Draws every block definition once into its own <symbol>, in the coordinate space of the block."""
+    for block_name, block in blocks.items():
+        symbol = dwg.symbol(id=symbol_id(block_name), overflow='visible')  # block geometry lies around the origin
+        draw_entities(block.entities, symbol, blocks, dwg, use_symbols=True)
+        dwg.defs.add(symbol)
 
 
-def draw_insert(entity, svg_group, blocks, dwg):
-    """Draws an INSERT entity with its attributes."""
-    name = entity['name']
+def draw_insert_use(entity, svg_group, blocks, dwg):
+    """Draws an INSERT as a <use> of its block symbol, with its ATTRIB texts on top."""
+    name = entity.name
     if name not in blocks:
         return  # Block definition not found
 
-    block_entities = blocks[name]
-    transform = {
-        'scale': (entity.get('xscale', 1.0), entity.get('yscale', 1.0)),
-        'rotation': entity.get('rotation', 0),
-        'translation': entity['coordinates']
-    }
-
-    # Draw each entity in the block
-    for block_entity in block_entities:
-        if block_entity['type'] == 'ATTDEF':
-            # Find the corresponding ATTRIB from the insert
-            attrib = next((a for a in entity.get('attribs', []) if a['tag'] == block_entity['tag']), None)
-            if attrib:
-                attrib_text = attrib.get('text', block_entity.get('text', ''))
-                # Draw the text attribute
-                text_position = transform_point(attrib['coordinates'], transform['scale'], 
-                                                transform['rotation'], transform['translation'])
-                text_rotation = attrib.get('rotation', 0) 
-                svg_group.add(dwg.text(attrib_text, insert=text_position, 
-                                 transform=f'rotate({text_rotation},{text_position[0]},{text_position[1]}) scale(1, -1) translate(0, {-2 * text_position[1]})',
-                                 font_size=block_entity.get('height', 10)))
-        elif block_entity['type'] == 'LINE':
-            draw_line(block_entity, svg_group, dwg, transform)
-        elif block_entity['type'] == 'CIRCLE':
-            draw_circle(block_entity, svg_group, dwg, transform)
-        elif block_entity['type'] == 'TEXT':
-            draw_text(block_entity, svg_group, dwg, transform)
-        elif block_entity['type'] == 'SOLID':
-            draw_solid(block_entity, svg_group, dwg, transform)
-        elif block_entity['type'] == 'POLYLINE':
-            draw_polyline(block_entity, svg_group, dwg, transform)
-        elif block_entity['type'] == 'ARC':
-            draw_arc(block_entity, svg_group, dwg, transform)
-
-
-def main(input_file, output_file):
-    blocks = {}
-    entities = []
-    
-    with open(input_file, 'r') as f:
-        json_data = json.load(f)
-    
-    for item in json_data:
-        if item['type'] == 'BLOCK':
-            blocks[item['block_name']] = item['entities']
-        else:
-            entities.append(item)
-
-    # Estimate viewport size
-    min_x, min_y, max_x, max_y = get_min_max_coordinates(entities)
+    transform = Affine.from_record(entity)
+    svg_group.add(dwg.use(f'#{symbol_id(name)}', transform=transform.svg(number_format(dwg))))
+    draw_attribs(entity, blocks[name], svg_group, dwg)
+
+
+def draw_attribs(entity, block, svg_group, dwg, parent_transform = None):
+    """
+    Draws the ATTRIB texts of an INSERT for the ATTDEFs of its block (a RenderBlock), in ATTDEF order.
+    ATTRIBs are already placed in the coordinates of the INSERT's parent (the world for top level INSERTs),
+    so only the transformation of the parent applies; like TEXT in draw_text, they turn and scale with it.
+    """
+    attribs = entity.attribs_by_tag
+    if not attribs:
+        return
+    fmt = number_format(dwg)
+    for attdef in block.attdefs:
+        # Find the corresponding ATTRIB from the insert
+        attrib = attribs.get(attdef.tag)
+        if attrib:
+            attrib_text = attrib.text if attrib.text is not None else attdef.text if attdef.text is not None else ''
+            # Draw the text attribute
+            text_rotation = attrib.rotation if attrib.rotation is not None else 0
+            font_size = attrib.height if attrib.height is not None else attdef.height if attdef.height is not None else 10
+            if parent_transform:
+                text_position = parent_transform.apply_point(attrib.coordinates)
+                text_rotation = float(text_rotation) + parent_transform.rotation
+                font_size = float(font_size) * parent_transform.scale[1]
+            else:
+                text_position = attrib.coordinates
+            svg_group.add(dwg.text(attrib_text, insert=text_position, 
+                             transform=f'rotate({fmt(text_rotation)},{fmt(text_position[0])},{fmt(text_position[1])}) scale(1, -1) translate(0, {fmt(-2 * text_position[1])})',
+                             font_size=font_size))
+
+
+class InsertRenderer:
+    """
+    Draws INSERTs inline: every block entity is drawn with the combined transformation of the INSERT and the
+    nested INSERTs it is part of. The entities of a block are resolved once into its draw plan, a list of
+    (entity, transformation within the block, block of the ATTRIBs or None) with nested blocks expanded,
+    which is reused for every INSERT of the block instead of walking the block hierarchy again.
+    """
+
+    __slots__ = ("blocks", "_plans")
+
+    def __init__(self, blocks):
+        self.blocks = blocks  # RenderBlock by block name
+        self._plans = {}
+
+    def plan(self, name, visiting = None):
+        """The memoized draw plan of a block, empty for unknown blocks (and for INSERTs that would recurse)."""
+        plan = self._plans.get(name)
+        if plan is not None:
+            return plan
+        visiting = visiting if visiting is not None else set()
+        if name not in self.blocks or name in visiting:
+            return ()
+        visiting.add(name)
+        plan = []
+        for entity in self.blocks[name].entities:
+            if entity.type == 'INSERT':
+                nested = self.blocks.get(entity.name)
+                if nested is None:
+                    continue  # Block definition not found
+                transform = Affine.from_record(entity)
+                # the ATTRIBs are placed in the block, the entities of the nested block by the INSERT
+                plan.append((entity, None, nested))
+                combined = {}  # one combined transformation per nested INSERT, shared by its entities
+                for nested_entity, nested_transform, attribs_block in self.plan(entity.name, visiting):
+                    if nested_transform is None:
+                        plan.append((nested_entity, transform, attribs_block))
+                        continue
+                    if id(nested_transform) not in combined:
+                        combined[id(nested_transform)] = transform @ nested_transform
+                    plan.append((nested_entity, combined[id(nested_transform)], attribs_block))
+            elif entity.type in DRAW_HANDLERS:
+                plan.append((entity, None, None))
+        visiting.discard(name)
+        self._plans[name] = plan
+        return plan
+
+    def draw(self, entity, svg_group, dwg, parent_transform = None):
+        """Draws an INSERT entity with its attributes, its ATTDEFs are drawn as ATTRIB by draw_attribs."""
+        name = entity.name
+        if name not in self.blocks:
+            return  # Block definition not found
+
+        # one matrix per INSERT instead of recomputing the rotation for every point
+        transform = Affine.from_record(entity)
+        if parent_transform:
+            transform = parent_transform @ transform
+
+        draw_attribs(entity, self.blocks[name], svg_group, dwg, parent_transform)
+        # consecutive entities of a nested block share its transformation, combine it once for all of them
+        local_transform, entity_transform = None, transform
+        for block_entity, block_transform, attribs_block in self.plan(name):
+            if block_transform is not local_transform:
+                local_transform = block_transform
+                entity_transform = transform @ block_transform if block_transform else transform
+            if attribs_block is not None:
+                draw_attribs(block_entity, attribs_block, svg_group, dwg, entity_transform)
+            else:
+                DRAW_HANDLERS[block_entity.type](block_entity, svg_group, dwg, entity_transform)
+
+
+def draw_insert(entity, svg_group, blocks, dwg, parent_transform = None):
+    """Draws an INSERT entity with its attributes, nested INSERTs are drawn with the combined transformation."""
+    InsertRenderer(blocks).draw(entity, svg_group, dwg, parent_transform)
+
+
+def create_drawing(output_file, view_box, writer = 'svgwrite', precision = None, size = None):
+    """
+    Creates the drawing with svgwrite (validated, built in memory) or the lean streaming backend of svg_writer.
+    view_box: (min_x, min_y, width, height), its numbers are rounded to the precision of the streaming writer.
+    """
+    if writer == 'stream':
+        from svg_writer import StreamingDrawing
+        width, height = size if size else (None, None)
+        return StreamingDrawing(output_file, viewBox=view_box, precision=precision, width=width, height=height)
+    # Create the SVG drawing with full SVG 1.1 profile
+    if not isinstance(view_box, str):
+        view_box = " ".join(str(value) for value in view_box)
+    return svgwrite.Drawing(output_file, profile='full', viewBox=view_box, size=size or ('100%', '100%'))
+
+
+def load_model(input_file, model_cache = False, lazy = False):
+    """
+    The RenderModel of a dxf_entities.json or .jsonl file, pickled next to it with model_cache.
+    With lazy the entities of a JSONL file are streamed from the file every time they are drawn.
+    """
+    if lazy and not model_cache:
+        return RenderModel.open(input_file)
+    return RenderModel.load(input_file, default_cache_file(input_file) if model_cache else None)
+
+
+def main(input_file, output_file, use_symbols = True, writer = 'svgwrite', precision = None, model_cache = False, metrics = None):
+    """
+    Renders a converted plan. With Metrics (see metrics.py) the stages are timed and the drawing of the modelspace
+    entities per type ('draw.<type>' spans); the JSONL entities are read while they are drawn, so 'draw' includes reading them.
+    """
+    with metrics.measure('render') if metrics is not None else nullcontext():
+        # JSONL entities are read twice, for the view box and for drawing them, instead of being kept in memory;
+        # with the model cache the view box is stored in the pickled model
+        with metrics.span('load') if metrics is not None else nullcontext():
+            model = load_model(input_file, model_cache, lazy=True)
+        render(model, output_file, use_symbols, writer, precision, metrics)
+
+
+def render(model, output_file, use_symbols = True, writer = 'svgwrite', precision = None, metrics = None):
+    """Renders a RenderModel to output_file, e.g. one that was built from the records of a conversion in memory."""
+    def span(name):
+        return metrics.span(name) if metrics is not None else nullcontext()
+
+    blocks, entities = model.blocks, model.entities
+
+    # The view box covers the bounding boxes of the entities, INSERTs and arcs included
+    with span('bounds'):
+        min_x, min_y, max_x, max_y = model.bounds() or DEFAULT_BOUNDS
     width = max_x - min_x
     height = max_y - min_y
 
-    # Create the SVG drawing with full SVG 1.1 profile
-    dwg = svgwrite.Drawing(output_file, profile='full', viewBox=f"{min_x} {-min_y} {width} {height}")
-    transform_group = dwg.g(transform=f'translate(0, {height}) scale(1, -1)')
-    
-    # Define block symbols
-    for block_id, block_entities in blocks.items():
-        symbol = dwg.symbol(id=block_id, viewBox=f"{min_x} {-min_y} {width} {height}")
-        dwg.defs.add(symbol)
+    dwg = create_drawing(output_file, (min_x, -min_y, width, height), writer, precision)
 
-    # Draw main entities
-    draw_entities(entities, transform_group, blocks, dwg)
-    dwg.add(transform_group)
+    # Define block symbols, each block is drawn once and every INSERT refers to it
+    if use_symbols:
+        with span('symbols'):
+            define_symbols(blocks, dwg)
 
-    # Save SVG file
-    dwg.save()
-    
-    
-
-# if __name__ == '__main__':
-#     import sys
-#     if len(sys.argv) != 3:
-#         print("Usage: python data2svg.py <input_file.json> <output_file.svg>")
-#         sys.exit(1)
-
-#     main(sys.argv[1], sys.argv[2])
+    # The group is added before it is drawn into, so the streaming backend can write every entity right away
+    transform_group = dwg.g(transform=f'translate(0, {number_format(dwg)(height)}) scale(1, -1)')
+    dwg.add(transform_group)
 
+    # Draw main entities
+    timer = EntityTimer(metrics, 'draw') if metrics is not None else None
+    with span('draw'):
+        draw_entities(entities, transform_group, blocks, dwg, use_symbols, timer)
+    if timer is not None:
+        timer.flush()
 
-main("./output/dxf_entities.json", "output/output.svg")
+    # Save SVG file
+    with span('save'):
+        dwg.save()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Renders the JSON output of dxf2model.py as SVG.")
+    parser.add_argument("input_file", nargs="?", default="./output/dxf_entities.json")
+    parser.add_argument("output_file", nargs="?", default="output/output.svg")
+    parser.add_argument("--no-symbols", action="store_true", help="draw the block entities for every INSERT instead of <use>-ing a <symbol> per block")
+    parser.add_argument("--writer", choices=["svgwrite", "stream"], default="svgwrite", help="stream: lean SVG writer that writes elements as they are drawn (an .svgz output file is gzipped)")
+    parser.add_argument("--precision", type=int, help="number of decimals of the coordinates (stream writer only)")
+    parser.add_argument("--model-cache", action="store_true", help="keep the preprocessed render model in <input_file>.render-model.pickle for the next renders")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    metrics = instrumentation.from_arguments(args)
+    main(args.input_file, args.output_file, use_symbols=not args.no_symbols, writer=args.writer, precision=args.precision,
+         model_cache=args.model_cache, metrics=metrics)
+    instrumentation.write_outputs(metrics, args, input_file=args.input_file)
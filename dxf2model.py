@@ -1,104 +1,81 @@
+import argparse
 import ezdxf
-import json
-
-# Helper function to convert non-serializable objects into serializable data
-def convert_value(value):
-    if isinstance(value, ezdxf.math.Vec3):  # Convert Vec3 objects (e.g., points) to lists
-        return [value.x, value.y] # , value.z omitted
-    elif isinstance(value, tuple):  # Convert tuples (like RGB colors or points) to lists
-        return list(value)
-    elif hasattr(value, 'x') and hasattr(value, 'y'): # and hasattr(value, 'z') omitted
-        # Catch any custom point object with x, y, z attributes (like Insert types)
-        return [value.x, value.y] # , value.z omitted
-    else:
-        return str(value)  # As a last resort, convert to string
-
-# Load the DXF file
-doc = ezdxf.readfile("/Users/peter/Projects/AWV/arch-313-AI-assistent-iVRI/docs/kruispunten/799C8-V016028-Meise/V016028v07_GPL_R12.dxf")
-msp = doc.modelspace()  # Access the modelspace
+import gc
+import os
+import sys
+from contextlib import nullcontext
+from time import perf_counter
+
+import serializer
+from block_graph import BlockGraph, inserted_block_names
+from bounds import add_bboxes
+from dxf_extractors import convert_value, extract_entity
+import metrics as instrumentation
+from metrics import EntityTimer
+from serializer import write_jsonl
+
+# Bump when the produced output changes, this invalidates the conversion cache
+CONVERTER_VERSION = "5"
+
+COLUMNAR_DIR = "dxf_entities.columns"
+
+DEFAULT_DXF_FILE = "/Users/peter/Projects/AWV/arch-313-AI-assistent-iVRI/docs/kruispunten/799C8-V016028-Meise/V016028v07_GPL_R12.dxf"
+
+
+def span(metrics, name):
+    """A timing span of the Metrics, or nothing when the conversion is not instrumented."""
+    return metrics.span(name) if metrics is not None else nullcontext()
+
 
 # Iterate over all entities in the modelspace
-def process_entities(entities, empty_block_names):
-    # List to store all entities' attributes
-    entities_data = []
-    for entity in entities:
-        # Dictionary to hold this entity's attributes
-        entity_data = {
-            "type": entity.dxftype(),
-            "id": entity.dxf.handle
-        }
-        
-        # Collect common DXF attributes dynamically
-        skip_keys = ["location", "vtx0", "vtx1", "vtx2", "vtx3", "start", "end", "insert", "_entity", "owner", "handle", "center"] # location and vtxX are part the coordinates
-        for key, value in vars(entity.dxf).items():
-            if (key not in skip_keys): 
-                if (key in ['rotation', 'xscale', 'yscale', 'radius', 'start_angle', 'end_angle', 'color']):
-                    entity_data[key] = float(value)
+def iter_entities(entities, empty_block_names, entity_filter=None, in_block=False, metrics=None):
+    """
+    Yields the attributes of each entity as soon as it is converted, so callers can stream them.
+    Entities rejected by the entity_filter are skipped before any attribute is converted.
+    With Metrics the extraction is timed per entity type and the skipped entities are counted.
+    """
+    empty_block_names = frozenset(empty_block_names)
+    timer = EntityTimer(metrics, "extract") if metrics is not None else None
+    filtered = skipped_inserts = dropped_attribs = 0
+    try:
+        for entity in entities:
+            if entity_filter is not None and not entity_filter.accepts(entity, in_block):
+                filtered += 1
+                continue
+            if timer is None:
+                entity_data = extract_entity(entity)
+            else:
+                start = perf_counter()
+                entity_data = extract_entity(entity)
+                timer.add(entity_data["type"], perf_counter() - start)
+                if "attribs" in entity_data:
+                    # ATTRIBs with an empty text are not exported
+                    dropped_attribs += len(entity.attribs) - len(entity_data["attribs"])
+
+            # Skip INSERTs of empty blocks
+            if "name" in entity_data:
+                if entity_data["name"] not in empty_block_names:
+                    yield entity_data
                 else:
-                    entity_data[key] = convert_value(value)
-
-        if entity.dxftype() == "POINT":
-            entity_data["coordinates"] = convert_value(entity.dxf.location)
-        elif entity.dxftype() == "LINE":
-            entity_data["coordinates"] = [convert_value(entity.dxf.start), convert_value(entity.dxf.end)]
-        elif entity.dxftype() == "CIRCLE":
-            entity_data["coordinates"] = convert_value(entity.dxf.center)
-            entity_data["radius"] = float(entity.dxf.radius)
-        elif entity.dxftype() == "TEXT":
-            entity_data["text"] = entity.dxf.text
-            entity_data["coordinates"] = convert_value(entity.dxf.insert)
-        elif entity.dxftype() == "ARC":
-            entity_data["coordinates"] = convert_value(entity.dxf.center)
-        elif entity.dxftype() == "POLYLINE":
-            points = []
-            # Iterate through all vertices in the POLYLINE entity
-            for vertex in entity.vertices:
-                points.append([vertex.dxf.location.x, vertex.dxf.location.y])
-            entity_data["coordinates"] = points
-            entity_data["is_closed"] = entity.is_closed # or entity.dxf.flags & ezdxf.lldxfconst.POLYLINE_CLOSED
-        elif entity.dxftype() == "SOLID":
-            entity_data["coordinates"] = [convert_value(entity.dxf.vtx0), convert_value(entity.dxf.vtx1), convert_value(entity.dxf.vtx2), convert_value(entity.dxf.vtx3)]
-        elif entity.dxftype() == "LWPOLYLINE":
-            entity_data["coordinates"] = [[point[0], point[1]] for point in entity]
-            entity_data["is_closed"] = entity.is_closed 
-        elif entity.dxftype() == "ATTDEF": # only part of BLOCK entities
-            ""
-        elif entity.dxftype() == "INSERT": 
-            attribs = entity.attribs
-            attribs_data_list = []
-            for attrib in attribs:
-                attrib_data = {
-                    "type": attrib.dxftype(),
-                    "id": attrib.dxf.handle
-                }
-                for key, value in vars(attrib.dxf).items():
-                    if (key not in ["insert", "_entity", "handle"]): 
-                        if (key in ['rotation', 'xscale', 'yscale', 'radius', 'start_angle', 'end_angle', 'color']):
-                            attrib_data[key] = float(value)
-                        else:
-                            attrib_data[key] = convert_value(value)
-                attrib_data["coordinates"] = convert_value(attrib.dxf.insert)
-                # hieronder veronderstellen we dat een attrib dat geen text heeft, niet ingevuld werd door de gebruiker en dus weinig zin heeft
-                if attrib_data["text"]: 
-                    attribs_data_list.append(attrib_data)
-            entity_data["attribs"] = attribs_data_list
-            entity_data["coordinates"] = convert_value(entity.dxf.insert)
-        elif entity.dxftype() == "ATTRIB":
-            "See entity.attribs in INSERT entities."
-    
-        # Append this entity's data to the main list
-        if "name" in entity_data:
-            if entity_data["name"] not in empty_block_names:
-                entities_data.append(entity_data)
-        else:
-            entities_data.append(entity_data)
-        
-    return entities_data
+                    skipped_inserts += 1
+            else:
+                yield entity_data
+    finally:
+        if timer is not None:
+            timer.flush()
+            metrics.count("entities_filtered", filtered)
+            metrics.count("empty_block_inserts_skipped", skipped_inserts)
+            metrics.count("empty_attribs_dropped", dropped_attribs)
+
+
+def process_entities(entities, empty_block_names, entity_filter=None, in_block=False, metrics=None):
+    # List to store all entities' attributes
+    return list(iter_entities(entities, empty_block_names, entity_filter, in_block, metrics))
 
 
-def process_block(block, empty_block_names):
+def process_block(block, empty_block_names, entity_filter=None, metrics=None):
     block_list = []
-    entities = process_entities(block, empty_block_names)
+    entities = process_entities(block, empty_block_names, entity_filter, in_block=True, metrics=metrics)
     if entities:
         block_list.append(
             {
@@ -112,54 +89,305 @@ def process_block(block, empty_block_names):
 
 
 def find_empty_blocks(blocks):
-    empty_block_names = []
-    for block in blocks:
-        if not block:
-            empty_block_names.append(block.name)
-    return empty_block_names
+    return BlockGraph.from_entities([], blocks).empty_blocks()
 
 
 def find_unused_blocks(top_level_entities, blocks):
     """
-    - BLOCK use can be recursive: INSERT entities can use a BLOCK inside a BLOCK definition
-    - a BLOCK definition cannot contain another BLOCK definitions
-    
-    So: first find all BLOCK inserts in msp and then the recursive inserts inside these blocks
+    Blocks that are not inserted by the top level entities, directly or through nested INSERTs
+    (see BlockGraph for a reusable graph that is built in a single scan).
+    """
+    return BlockGraph.from_entities(top_level_entities, blocks).unused_blocks()
+
+
+def iter_document(doc, empty_block_names, unused_blocks, entity_filter=None, metrics=None, block_order=None):
     """
-    all_blocks = set()
-    used_blocks = set()
-    for entity in top_level_entities:
-        if entity.dxftype() == "INSERT":
-            used_blocks.add(entity.dxf.name)
+    Yields the BLOCK records first and then the modelspace entities, one record at a time.
+    Only a single block (with its entities) is held in memory at any moment.
+    block_order: the names of the blocks in the order they are yielded, e.g. BlockGraph.dependency_order so that
+    nested blocks come before the blocks inserting them (which bounds.add_bboxes needs to stream them);
+    by default the order of the document.
+    """
+    skipped_blocks = set(unused_blocks).union(empty_block_names)
+    if metrics is not None:
+        # counted from the sets, a block_order only names the blocks that are used
+        for name in skipped_blocks:
+            metrics.count("blocks_skipped_empty" if name in empty_block_names else "blocks_skipped_unused")
+    blocks = doc.blocks if block_order is None else (doc.blocks.get(name) for name in block_order)
     for block in blocks:
-        all_blocks.add(block.name)
-        if block.name in used_blocks:
-            for block_entity in block:
-                if block_entity.dxftype() == "INSERT":
-                    used_blocks.add(block_entity.dxf.name)
-    return all_blocks - used_blocks
+        if block.name not in skipped_blocks:
+            yield from process_block(block, empty_block_names, entity_filter, metrics)
+    yield from iter_entities(doc.modelspace(), empty_block_names, entity_filter, metrics=metrics)
+
+
+def iter_modelspace_entities(dxf_file, entity_filter=None, metrics=None):
+    """
+    Streams the modelspace entities straight from the file with ezdxf's iterdxf add-on,
+    without loading the document. BLOCK definitions are not available in this mode.
+    """
+    from ezdxf.addons import iterdxf
+    # the type filter is passed on to iterdxf, which then does not even build the other entities
+    types = entity_filter.types if entity_filter is not None else None
+    yield from iter_entities(iterdxf.modelspace(dxf_file, types=types), [], entity_filter, metrics=metrics)
+
+
+def load_records(dxf_file, use_iterdxf=False, log=None, entity_filter=None, metrics=None):
+    """
+    Loads a DXF file and returns the generator of its records (BLOCK records first, see iter_document).
+    With an EntityFilter only the accepted entities, and the blocks they insert, are converted.
+    With Metrics the load and the block analysis are timed as the 'load' and 'block_analysis' spans.
+    """
+    if use_iterdxf:
+        return iter_modelspace_entities(dxf_file, entity_filter, metrics)
+
+    # Load the DXF file
+    with span(metrics, "load"):
+        doc = ezdxf.readfile(dxf_file)
+    # Analyse the block usage before any entity is extracted, so unused blocks are never converted
+    with span(metrics, "block_analysis"):
+        block_graph = BlockGraph.from_document(doc)
+        if entity_filter is not None:
+            entity_filter.bind(doc)
+            # blocks that are only used by filtered out INSERTs are not converted either
+            block_graph.root_inserts = inserted_block_names(e for e in doc.modelspace().query("INSERT") if entity_filter.accepts(e))
+        empty_block_names = block_graph.empty_blocks()
+        unused_blocks = block_graph.unused_blocks()
+    if log:
+        print(f"Empty block names: {empty_block_names}", file=log)
+        print(f"Unused blocks: {unused_blocks}", file=log)
+
+    # nested blocks first, so their bounding boxes are known when the blocks inserting them are converted
+    return iter_document(doc, empty_block_names, unused_blocks, entity_filter, metrics, block_graph.dependency_order())
+
+
+def count_records(records, stats):
+    """Passes the records through while counting the BLOCK records and all entities."""
+    for item in records:
+        if item["type"] == "BLOCK":
+            stats["blocks"] += 1
+            stats["entities"] += len(item["entities"])
+        else:
+            stats["entities"] += 1
+        yield item
+
+
+def output_files(stream, columnar=False, spatial_index=False):
+    """Names of the files (and directories) that a conversion writes into its output directory."""
+    files = ["dxf_entities.jsonl"] if stream else ["dxf_entities.json", "dxf_entities.jsonl"]
+    files.extend(name for _, name in extra_outputs(columnar, spatial_index))
+    return files
+
+
+def extra_outputs(columnar=False, spatial_index=False):
+    """The writers that collect the records for the outputs next to the JSON, as (writer, file name) pairs."""
+    writers = []
+    if columnar:
+        from columnar import ColumnarWriter
+        writers.append((ColumnarWriter(), COLUMNAR_DIR))
+    if spatial_index:
+        from spatial_index import SpatialIndexBuilder, INDEX_FILE
+        writers.append((SpatialIndexBuilder(), INDEX_FILE))
+    return writers
+
+
+def convert_file(dxf_file, output_dir="output", stream=False, use_iterdxf=False, columnar=False, spatial_index=False,
+                 explode=False, indent=False, log=None, cache=None, entity_filter=None, simplifier=None, metrics=None):
+    """
+    Converts a DXF file into dxf_entities.json and dxf_entities.jsonl in output_dir.
+    Every entity and BLOCK record gets its bounding box in a 'bbox' entry (see bounds.add_bboxes).
+    With stream (or use_iterdxf) only the JSONL file is written, output_dir '-' writes it to stdout.
+    The JSON is compact unless indent is set (see serializer.py for the JSON backends).
+    With columnar the geometry is also written as per-type column arrays (see columnar.py),
+    with spatial_index a grid index over the modelspace entities is saved next to it (see spatial_index.py).
+    With a ConversionCache, unchanged files are copied from the cache instead of being converted.
+    With an EntityFilter (see entity_filter.py) only the selected entities are converted.
+    With explode the INSERTs are replaced by their block entities in world coordinates (see explode.py).
+    With a Simplifier the geometry is quantized, simplified, deduplicated and merged before it is written
+    (see simplify.py), the returned stats then include its report under 'simplify'.
+    With Metrics (see metrics.py) the stages are timed and the converted and skipped entities are counted;
+    the records are extracted while they are written, so the 'write' span includes the 'extract.<type>' spans
+    and 'serialize' is the remainder.
+    Returns the number of BLOCK records and entities that were written.
+    """
+    options = {
+        "stream": stream or use_iterdxf,
+        "use_iterdxf": use_iterdxf,
+        "columnar": columnar,
+        "spatial_index": spatial_index,
+        "explode": explode,
+        "indent": indent,
+    }
+    if cache is not None and output_dir != "-":
+        key_options = dict(options)
+        if entity_filter is not None:
+            key_options["entity_filter"] = entity_filter.to_dict()
+        if simplifier is not None:
+            key_options["simplify"] = simplifier.to_dict()
+        key = cache.key(dxf_file, CONVERTER_VERSION, key_options)
+        stats = cache.fetch(key, output_dir)
+        if stats is not None:
+            if metrics is not None:
+                metrics.count("cache_hits")
+            if log:
+                print(f"Using cached conversion of {dxf_file}", file=log)
+            return dict(stats, cached=True)
+        stats = convert_file(dxf_file, output_dir, log=log, entity_filter=entity_filter, simplifier=simplifier, metrics=metrics, **options)
+        cache.store(key, output_dir, output_files(options["stream"], columnar, spatial_index), stats)
+        return dict(stats, cached=False)
+
+    extract_seconds = extract_time(metrics)
+    with metrics.measure("convert") if metrics is not None else nullcontext():
+        stats = {"blocks": 0, "entities": 0}
+        records = load_records(dxf_file, use_iterdxf, log, entity_filter, metrics)
+        if explode:
+            from explode import explode_records
+            records = explode_records(records)
+        if simplifier is not None:
+            from simplify import SimplifyReport
+            report = SimplifyReport()
+            records = simplifier.records(records, report)
+        records = count_records(add_bboxes(records), stats)
+
+        # The loaded document does not change while it is converted. Freezing it keeps the garbage collector
+        # from traversing the whole document again and again while the entity dicts are being allocated.
+        gc.collect()
+        gc.freeze()
+        try:
+            start = perf_counter()
+            write_records(records, output_dir, options["stream"], extra_outputs(columnar, spatial_index), indent)
+            write_seconds = perf_counter() - start
+        finally:
+            gc.unfreeze()
+
+    if metrics is not None:
+        metrics.add_time("write", write_seconds)
+        metrics.add_time("serialize", write_seconds - (extract_time(metrics) - extract_seconds))
+        metrics.count("blocks_converted", stats["blocks"])
+        metrics.count("entities_converted", stats["entities"])
+    if simplifier is not None:
+        stats["simplify"] = report.to_dict()
+        if log:
+            print(report.summary(), file=log)
+    return stats
+
+
+def convert_model(dxf_file, entity_filter=None, explode=False, simplifier=None, metrics=None):
+    """
+    Converts a DXF file into a RenderModel in memory (see render_model.py) without writing and reading the JSON,
+    e.g. to render it right away with data2svg.render. The records go through the same stages as in convert_file
+    and are turned into slotted entity records (see entity_model.py) one at a time.
+    """
+    from render_model import RenderModel
+
+    with metrics.measure("convert") if metrics is not None else nullcontext():
+        records = load_records(dxf_file, entity_filter=entity_filter, metrics=metrics)
+        if explode:
+            from explode import explode_records
+            records = explode_records(records)
+        if simplifier is not None:
+            records = simplifier.records(records)
+        return RenderModel.from_records(add_bboxes(records))
+
+
+def extract_time(metrics):
+    """Total of the extract.<type> spans so far."""
+    if metrics is None:
+        return 0.0
+    return sum(seconds for name, (seconds, _) in metrics.spans.items() if name.startswith("extract."))
+
+
+def collect(records, writers):
+    """Passes the records through while adding them to the writers of the extra outputs."""
+    for item in records:
+        for writer, _ in writers:
+            writer.add(item)
+        yield item
+
+
+def write_records(records, output_dir, stream, writers=(), indent=False):
+    if writers and output_dir != "-":
+        write_records(collect(records, writers), output_dir, stream, indent=indent)
+        for writer, name in writers:
+            writer.save(os.path.join(output_dir, name))
+        return
+
+    if stream or output_dir == "-":
+        if output_dir == "-":
+            sys.stdout.flush()
+            write_jsonl(records, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+            with open(os.path.join(output_dir, "dxf_entities.jsonl"), "wb") as jsonl_file:
+                write_jsonl(records, jsonl_file)
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Write the JSON and the JSONL file in one pass, compact records are not collected in memory
+    with open(os.path.join(output_dir, "dxf_entities.json"), "wb") as json_file, \
+            open(os.path.join(output_dir, "dxf_entities.jsonl"), "wb") as jsonl_file:
+        serializer.write_json_and_jsonl(records, json_file, jsonl_file, indent)
 
 
-empty_block_names = find_empty_blocks(doc.blocks)
-print(f"Empty block names: {empty_block_names}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converts the entities of a DXF file to JSON and JSONL.")
+    parser.add_argument("dxf_file", nargs="?", default=DEFAULT_DXF_FILE)
+    parser.add_argument("-o", "--output-dir", default="output", help="output directory, or '-' to stream JSONL to stdout")
+    parser.add_argument("--stream", action="store_true", help="only write the JSONL file, entity by entity")
+    parser.add_argument("--iterdxf", action="store_true", help="stream the modelspace with ezdxf's iterdxf add-on (implies --stream, no BLOCK records)")
+    parser.add_argument("--columnar", action="store_true", help=f"also write the geometry as per-type column arrays to {COLUMNAR_DIR}/")
+    parser.add_argument("--spatial-index", action="store_true", help="also write a spatial index of the modelspace entities (see spatial_index.py)")
+    parser.add_argument("--explode", action="store_true", help="replace the INSERTs by their block entities in world coordinates (no BLOCK records)")
+    parser.add_argument("--indent", action="store_true", help="write dxf_entities.json indented instead of compact")
+    parser.add_argument("--json-backend", choices=sorted(serializer.BACKENDS), help=f"JSON library (default: {serializer.get_backend().name})")
+    parser.add_argument("--cache-dir", help="reuse the output of earlier conversions of the same file from this cache directory")
+    parser.add_argument("--cache-max-size", type=float, default=1024, help="maximum cache size in MB (default: 1024)")
+    simplify = parser.add_argument_group("simplification", "shrink the output before it is written (see simplify.py)")
+    simplify.add_argument("--simplify", type=float, metavar="TOLERANCE",
+                          help="simplify polylines to this tolerance, drop zero-length and duplicate geometry and merge chained LINEs (0: exact duplicates only)")
+    simplify.add_argument("--quantize", type=int, metavar="DECIMALS", help="round the coordinates to this number of decimals")
+    simplify.add_argument("--keep-lines", action="store_true", help="do not merge chained LINEs into POLYLINEs")
+    simplify.add_argument("--simplify-report", action="store_true", help="also measure the JSON bytes saved (serializes every record twice)")
+    filters = parser.add_argument_group("filters", "select the entities to convert (the options can be repeated, names accept * and ? wildcards)")
+    filters.add_argument("--layer", action="append", help="only convert modelspace entities on this layer")
+    filters.add_argument("--exclude-layer", action="append", help="skip modelspace entities on this layer")
+    filters.add_argument("--type", action="append", help="only convert entities of this DXF type, e.g. LINE")
+    filters.add_argument("--exclude-type", action="append", help="skip entities of this DXF type")
+    filters.add_argument("--block", action="append", help="only convert INSERTs of this block (and its definition)")
+    filters.add_argument("--exclude-block", action="append", help="skip INSERTs of this block")
+    filters.add_argument("--bbox", type=float, nargs=4, metavar=("MIN_X", "MIN_Y", "MAX_X", "MAX_Y"),
+                         help="only convert modelspace entities that overlap this rectangle")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.json_backend:
+        serializer.set_backend(args.json_backend)
+    if args.explode and args.iterdxf:
+        parser.error("--explode needs the BLOCK definitions, which --iterdxf does not read")
 
-unused_blocks = find_unused_blocks(msp, doc.blocks)
-print(f"Unused blocks: {unused_blocks}")
+    entity_filter = None
+    if any((args.layer, args.exclude_layer, args.type, args.exclude_type, args.block, args.exclude_block, args.bbox)):
+        from entity_filter import EntityFilter
+        entity_filter = EntityFilter(args.layer, args.exclude_layer, args.type, args.exclude_type,
+                                     args.block, args.exclude_block, args.bbox)
 
-data = []
+    simplifier = None
+    if args.simplify is not None or args.quantize is not None:
+        from simplify import Simplifier
+        simplifier = Simplifier(args.simplify or 0.0, args.quantize, merge_lines=not args.keep_lines, measure_bytes=args.simplify_report)
 
-for block in doc.blocks:
-    if block.name not in unused_blocks:
-        block_list = process_block(block, empty_block_names)
-        data.extend(block_list)
+    cache = None
+    if args.cache_dir:
+        from conversion_cache import ConversionCache
+        cache = ConversionCache(args.cache_dir, int(args.cache_max_size * 1024 * 1024))
 
-data.extend(process_entities(msp, empty_block_names))
+    # keep stdout clean when it carries the JSONL stream
+    log = sys.stderr if args.output_dir == "-" else sys.stdout
+    metrics = instrumentation.from_arguments(args)
+    stats = convert_file(args.dxf_file, args.output_dir, stream=args.stream, use_iterdxf=args.iterdxf, columnar=args.columnar,
+                         spatial_index=args.spatial_index, explode=args.explode, indent=args.indent, log=log, cache=cache,
+                         entity_filter=entity_filter, simplifier=simplifier, metrics=metrics)
+    instrumentation.write_outputs(metrics, args, dxf_file=args.dxf_file, stats=stats)
 
-# Write the collected data to a JSON file
-with open("output/dxf_entities.json", "w") as json_file:
-    json.dump(data, json_file, indent=4)
 
-with open("output/dxf_entities.jsonl", "w") as jsonl_file:
-    for item in data:
-        json.dump(item, jsonl_file)
-        jsonl_file.write('\n')  # Write a newline after each JSON object
+if __name__ == '__main__':
+    main()
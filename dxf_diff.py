@@ -0,0 +1,112 @@
+"""
+Incremental re-conversion: compares a new revision of a DXF file with the output of the previous conversion
+and emits only the changes as a JSONL patch stream.
+
+Records are matched by key: the DXF handle (exported as id) for modelspace entities and BLOCK:<block name>
+for block definitions. A record is modified when the hash of its canonical JSON changed. Every patch line is
+
+    {"op": "add" | "modify", "key": ..., "record": {...}}
+    {"op": "delete", "key": ...}
+
+Adds and modifications are emitted while the new revision is converted, deletions at the end. Only the
+hashes of the previous conversion are kept in memory. apply_patch applies a patch to the previous records.
+The new records get their bounding boxes like in dxf2model.convert_file, so they compare equal to the records
+of an unchanged conversion and the patched records keep the format of the converter output.
+"""
+import argparse
+import hashlib
+import sys
+
+import dxf2model
+import serializer
+from bounds import add_bboxes
+
+
+def record_key(record):
+    if record["type"] == "BLOCK":
+        return f"BLOCK:{record['block_name']}"
+    return record["id"]
+
+
+def record_hash(record):
+    """
+    Hash of the canonical JSON of a record, independent of the key order. The handle of a BLOCK record is left
+    out: DXF R12 writers may renumber BLOCK entities on every save while the block content stays the same.
+    """
+    if record["type"] == "BLOCK":
+        record = {key: value for key, value in record.items() if key != "id"}
+    return hashlib.sha1(serializer.dumpb(record, sort_keys=True)).hexdigest()
+
+
+def iter_output_records(output_file):
+    """Streams the records of a dxf_entities.jsonl file (or loads a dxf_entities.json file)."""
+    return serializer.iter_records(output_file)
+
+
+def record_hashes(records):
+    return {record_key(record): record_hash(record) for record in records}
+
+
+def diff_records(previous_hashes, records):
+    """Yields the patch operations that turn the previous records (given by their hashes) into records."""
+    seen = set()
+    for record in records:
+        key = record_key(record)
+        seen.add(key)
+        previous = previous_hashes.get(key)
+        if previous is None:
+            yield {"op": "add", "key": key, "record": record}
+        elif previous != record_hash(record):
+            yield {"op": "modify", "key": key, "record": record}
+    for key in previous_hashes:
+        if key not in seen:
+            yield {"op": "delete", "key": key}
+
+
+def apply_patch(records, patch):
+    """
+    Applies patch operations to a list of records and returns the new list. Modified records keep their
+    position, added BLOCK records go after the existing BLOCK records and other additions at the end.
+    """
+    positions = {record_key(record): i for i, record in enumerate(records)}
+    records = list(records)
+    added_blocks = []
+    added = []
+    for operation in patch:
+        key = operation["key"]
+        if operation["op"] == "modify" and key in positions:
+            records[positions[key]] = operation["record"]
+        elif operation["op"] == "delete" and key in positions:
+            records[positions[key]] = None
+        elif operation["op"] in ("add", "modify"):
+            (added_blocks if operation["record"]["type"] == "BLOCK" else added).append(operation["record"])
+    records = [record for record in records if record is not None]
+    block_count = sum(1 for record in records if record["type"] == "BLOCK")
+    return records[:block_count] + added_blocks + records[block_count:] + added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emits the changes between a DXF file and a previous conversion as a JSONL patch.")
+    parser.add_argument("dxf_file", help="new revision of the DXF file")
+    parser.add_argument("previous", help="dxf_entities.json(l) of the previous conversion")
+    parser.add_argument("-o", "--output", default="-", help="patch file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    previous_hashes = record_hashes(iter_output_records(args.previous))
+    records = add_bboxes(dxf2model.load_records(args.dxf_file, log=sys.stderr))
+
+    counts = {"add": 0, "modify": 0, "delete": 0}
+    patch_file = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for operation in diff_records(previous_hashes, records):
+            counts[operation["op"]] += 1
+            patch_file.write(serializer.dumpb(operation))
+            patch_file.write(b"\n")
+    finally:
+        if patch_file is not sys.stdout.buffer:
+            patch_file.close()
+    print(f"{counts['add']} added, {counts['modify']} modified, {counts['delete']} deleted", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
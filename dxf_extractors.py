@@ -0,0 +1,154 @@
+import ezdxf
+from ezdxf.lldxf.attributes import XType
+
+# location and vtxX are part the coordinates
+SKIP_KEYS = ("location", "vtx0", "vtx1", "vtx2", "vtx3", "start", "end", "insert", "_entity", "owner", "handle", "center")
+ATTRIB_SKIP_KEYS = ("insert", "_entity", "handle")
+FLOAT_KEYS = ("rotation", "xscale", "yscale", "radius", "start_angle", "end_angle", "color")
+POINT_XTYPES = (XType.point2d, XType.point3d, XType.any_point)
+
+
+# Helper function to convert non-serializable objects into serializable data
+def convert_value(value):
+    if isinstance(value, ezdxf.math.Vec3):  # Convert Vec3 objects (e.g., points) to lists
+        return [value.x, value.y] # , value.z omitted
+    elif isinstance(value, tuple):  # Convert tuples (like RGB colors or points) to lists
+        return list(value)
+    elif hasattr(value, 'x') and hasattr(value, 'y'): # and hasattr(value, 'z') omitted
+        # Catch any custom point object with x, y, z attributes (like Insert types)
+        return [value.x, value.y] # , value.z omitted
+    else:
+        return str(value)  # As a last resort, convert to string
+
+
+def convert_point(value):
+    return [value.x, value.y] # , value.z omitted
+
+
+def compile_converters(entity_class, skip_keys):
+    """
+    Maps each DXF attribute name of entity_class to the function that converts its value, or None when the
+    attribute is skipped. The DXF namespace of an entity only holds attributes of its class definition.
+    """
+    converters = {}
+    attribs = entity_class.DXFATTRIBS
+    for _, key in attribs.build_group_code_items():
+        if key in FLOAT_KEYS:
+            converters[key] = float
+        elif attribs.get(key).xtype in POINT_XTYPES:
+            converters[key] = convert_point
+        elif attribs.get(key).xtype is None:
+            converters[key] = str  # plain strings and numbers, same result as convert_value
+        else:
+            converters[key] = convert_value
+    for key in skip_keys:
+        converters[key] = None
+    return converters
+
+
+def point_geometry(entity, dxf, entity_data):
+    entity_data["coordinates"] = convert_point(dxf.location)
+
+
+def line_geometry(entity, dxf, entity_data):
+    entity_data["coordinates"] = [convert_point(dxf.start), convert_point(dxf.end)]
+
+
+def circle_geometry(entity, dxf, entity_data):
+    entity_data["coordinates"] = convert_point(dxf.center)
+    entity_data["radius"] = float(dxf.radius)
+
+
+def text_geometry(entity, dxf, entity_data):
+    entity_data["text"] = dxf.text
+    entity_data["coordinates"] = convert_point(dxf.insert)
+
+
+def arc_geometry(entity, dxf, entity_data):
+    entity_data["coordinates"] = convert_point(dxf.center)
+    # also when the DXF file leaves them to their defaults, the renderer needs all three
+    entity_data["radius"] = float(dxf.radius)
+    entity_data["start_angle"] = float(dxf.start_angle)
+    entity_data["end_angle"] = float(dxf.end_angle)
+
+
+def polyline_geometry(entity, dxf, entity_data):
+    # Iterate through all vertices in the POLYLINE entity
+    entity_data["coordinates"] = [convert_point(vertex.dxf.location) for vertex in entity.vertices]
+    entity_data["is_closed"] = entity.is_closed # or entity.dxf.flags & ezdxf.lldxfconst.POLYLINE_CLOSED
+
+
+def solid_geometry(entity, dxf, entity_data):
+    entity_data["coordinates"] = [convert_point(dxf.vtx0), convert_point(dxf.vtx1), convert_point(dxf.vtx2), convert_point(dxf.vtx3)]
+
+
+def lwpolyline_geometry(entity, dxf, entity_data):
+    # the points are NumPy rows, plain floats keep every JSON backend (and pickle) fast
+    entity_data["coordinates"] = [[float(point[0]), float(point[1])] for point in entity]
+    entity_data["is_closed"] = entity.is_closed
+
+
+def insert_geometry(entity, dxf, entity_data):
+    attribs_data_list = []
+    for attrib in entity.attribs:
+        attrib_data = extract_entity(attrib, ATTRIB_EXTRACTORS, ATTRIB_SKIP_KEYS)
+        attrib_data["coordinates"] = convert_point(attrib.dxf.insert)
+        # hieronder veronderstellen we dat een attrib dat geen text heeft, niet ingevuld werd door de gebruiker en dus weinig zin heeft
+        if attrib_data["text"]:
+            attribs_data_list.append(attrib_data)
+    entity_data["attribs"] = attribs_data_list
+    entity_data["coordinates"] = convert_point(dxf.insert)
+
+
+# ATTDEF is only part of BLOCK entities and ATTRIBs are exported with their INSERT (see insert_geometry),
+# both only need their DXF attributes
+GEOMETRY = {
+    "POINT": point_geometry,
+    "LINE": line_geometry,
+    "CIRCLE": circle_geometry,
+    "TEXT": text_geometry,
+    "ARC": arc_geometry,
+    "POLYLINE": polyline_geometry,
+    "SOLID": solid_geometry,
+    "LWPOLYLINE": lwpolyline_geometry,
+    "INSERT": insert_geometry,
+}
+
+
+def compile_extractor(entity_class, dxftype, skip_keys):
+    """Builds the function that converts one entity of the given DXF type into its dict."""
+    converters = compile_converters(entity_class, skip_keys)
+    # the exported attributes of the type and their converters, in the order of the DXF definition
+    fields = tuple((key, convert) for key, convert in converters.items() if convert is not None)
+    geometry = GEOMETRY.get(dxftype) if skip_keys is SKIP_KEYS else None
+
+    def extractor(entity):
+        dxf = entity.dxf
+        entity_data = {
+            "type": dxftype,
+            "id": dxf.handle
+        }
+        # only the attributes that are present in the entity are exported
+        values = vars(dxf)
+        for key, convert in fields:
+            if key in values:
+                entity_data[key] = convert(values[key])
+        if geometry is not None:
+            geometry(entity, dxf, entity_data)
+        return entity_data
+
+    return extractor
+
+
+# dxftype -> extractor, compiled on first use of a type
+EXTRACTORS = {}
+ATTRIB_EXTRACTORS = {}
+
+
+def extract_entity(entity, extractors=EXTRACTORS, skip_keys=SKIP_KEYS):
+    """Converts an entity into a serializable dict with the extractor of its DXF type."""
+    dxftype = entity.dxftype()
+    extractor = extractors.get(dxftype)
+    if extractor is None:
+        extractor = extractors[dxftype] = compile_extractor(type(entity), dxftype, skip_keys)
+    return extractor(entity)
@@ -0,0 +1,258 @@
+"""
+Inventory of DXF files for triage: entity counts per type, per layer and per block, the ATTDEF tags of the
+blocks and the block usage of the modelspace. The file is scanned as raw group code / value line pairs,
+without building the ezdxf document, and names are only decoded once per distinct value at the end.
+"""
+import argparse
+import json
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from ezdxf.tools.codepage import toencoding
+
+from batch_convert import find_dxf_files
+
+# Entities that belong to the preceding POLYLINE or INSERT, ezdxf does not list them as entities of their own
+SUBENTITY_TYPES = frozenset((b"VERTEX", b"ATTRIB", b"SEQEND"))
+SECTION_MARKERS = frozenset((b"SECTION", b"ENDSEC", b"EOF"))
+
+
+def _increment(counts, key):
+    counts[key] = counts.get(key, 0) + 1
+
+
+def _new_block():
+    return {"types": {}, "layers": {}, "inserts": {}, "attdefs": []}
+
+
+def scan_dxf(data):
+    """
+    Scans the content of an ASCII DXF file (bytes) and returns the raw inventory with undecoded names,
+    see inventory() for the decoded report.
+    """
+    if data.startswith(b"AutoCAD Binary DXF"):
+        raise ValueError("binary DXF files are not supported")
+    header = {}
+    modelspace = _new_block()
+    paperspace = {}
+    subentities = {}
+    blocks = {}
+    table_layers = []
+
+    section = None
+    header_variable = None
+    block = None  # the block that is being read in the BLOCKS section
+    entity_type = layer = name = None
+    in_paperspace = False
+
+    lines = iter(data.splitlines())
+    for code, value in zip(lines, lines):
+        code = code.strip()
+        if code == b"0":
+            # a new entity starts, count the previous one
+            if entity_type is not None and entity_type not in SECTION_MARKERS:
+                if section == b"ENTITIES":
+                    if entity_type in SUBENTITY_TYPES:
+                        _increment(subentities, entity_type)
+                    elif in_paperspace:
+                        _increment(paperspace, entity_type)
+                    else:
+                        _increment(modelspace["types"], entity_type)
+                        _increment(modelspace["layers"], layer)
+                        if entity_type == b"INSERT":
+                            _increment(modelspace["inserts"], name)
+                elif section == b"BLOCKS":
+                    if entity_type == b"BLOCK":
+                        block = blocks.setdefault(name, _new_block())
+                    elif entity_type == b"ENDBLK":
+                        block = None
+                    elif block is not None:
+                        if entity_type in SUBENTITY_TYPES:
+                            _increment(subentities, entity_type)
+                        else:
+                            _increment(block["types"], entity_type)
+                            _increment(block["layers"], layer)
+                            if entity_type == b"INSERT":
+                                _increment(block["inserts"], name)
+                            elif entity_type == b"ATTDEF":
+                                block["attdefs"].append(name)
+                elif section == b"TABLES" and entity_type == b"LAYER":
+                    table_layers.append(name)
+            entity_type = value.strip()
+            if entity_type == b"ENDSEC":
+                section = None
+            layer = b"0"
+            name = None
+            in_paperspace = False
+        elif code == b"8":
+            layer = value.strip()
+        elif code == b"2":
+            # block name of BLOCK and INSERT, tag of ATTDEF, table entry name, section name
+            name = value.strip()
+            if entity_type == b"SECTION":
+                section = name
+        elif code == b"67":
+            in_paperspace = value.strip() == b"1"
+        elif section == b"HEADER":
+            if code == b"9":
+                header_variable = value.strip()
+            elif header_variable in (b"$ACADVER", b"$DWGCODEPAGE"):
+                header[header_variable] = value.strip()
+                header_variable = None
+
+    return {
+        "header": header,
+        "modelspace": modelspace,
+        "paperspace": paperspace,
+        "subentities": subentities,
+        "blocks": blocks,
+        "table_layers": table_layers,
+    }
+
+
+def _decode_counts(counts, decode):
+    return {decode(key): count for key, count in sorted(counts.items(), key=lambda item: (-item[1], item[0] or b""))}
+
+
+def _decode_block(block, decode):
+    return {
+        "entities": sum(block["types"].values()),
+        "types": _decode_counts(block["types"], decode),
+        "layers": _decode_counts(block["layers"], decode),
+        "inserts": _decode_counts(block["inserts"], decode),
+        "attdefs": [decode(tag) for tag in block["attdefs"]],
+    }
+
+
+def inventory(dxf_file):
+    """Returns the inventory report of a DXF file as a JSON compatible dict."""
+    start = time.perf_counter()
+    with open(dxf_file, "rb") as f:
+        data = f.read()
+    raw = scan_dxf(data)
+
+    dxfversion = raw["header"].get(b"$ACADVER", b"AC1009").decode("ascii", "replace")
+    if dxfversion >= "AC1021":
+        encoding = "utf-8"
+    else:
+        encoding = toencoding(raw["header"].get(b"$DWGCODEPAGE", b"ANSI_1252").decode("ascii", "replace"))
+
+    def decode(value):
+        return value.decode(encoding, "replace") if value is not None else None
+
+    modelspace = _decode_block(raw["modelspace"], decode)
+    blocks = {decode(name): _decode_block(block, decode) for name, block in raw["blocks"].items()}
+    return {
+        "dxf_file": dxf_file,
+        "dxfversion": dxfversion,
+        "size": len(data),
+        "entities": modelspace["entities"],
+        "types": modelspace["types"],
+        "layers": modelspace["layers"],
+        "inserts": modelspace["inserts"],
+        "paperspace": _decode_counts(raw["paperspace"], decode),
+        "subentities": _decode_counts(raw["subentities"], decode),
+        "table_layers": [decode(name) for name in raw["table_layers"]],
+        "blocks": blocks,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def inventory_one(dxf_file):
+    """Runs inventory() in a worker; failures are returned instead of raised."""
+    try:
+        result = inventory(dxf_file)
+        result["status"] = "ok"
+    except Exception as e:
+        result = {"dxf_file": dxf_file, "status": "error", "error": f"{type(e).__name__}: {e}",
+                  "traceback": traceback.format_exc()}
+    return result
+
+
+def inventory_batch(dxf_files, workers=None):
+    """
+    Scans all DXF files in a process pool with the given number of workers (default: all cores),
+    workers=1 scans them in this process. Returns the per-file reports and a summary over all files.
+    """
+    start = time.perf_counter()
+    if workers == 1 or len(dxf_files) <= 1:
+        results = [inventory_one(dxf_file) for dxf_file in dxf_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # the files are small compared to the cost of a round trip to a worker, hand them out in chunks
+            results = list(executor.map(inventory_one, dxf_files, chunksize=16))
+    elapsed = time.perf_counter() - start
+
+    scanned = [r for r in results if r["status"] == "ok"]
+    types = {}
+    layers = {}
+    for result in scanned:
+        for entity_type, count in result["types"].items():
+            types[entity_type] = types.get(entity_type, 0) + count
+        for layer in result["layers"]:
+            layers[layer] = layers.get(layer, 0) + 1
+    summary = {
+        "files": len(results),
+        "scanned": len(scanned),
+        "failed": len(results) - len(scanned),
+        "entities": sum(r["entities"] for r in scanned),
+        "types": dict(sorted(types.items(), key=lambda item: -item[1])),
+        "files_per_layer": dict(sorted(layers.items(), key=lambda item: -item[1])),
+        "seconds": elapsed,
+        "files_per_second": len(scanned) / elapsed if elapsed else 0.0,
+    }
+    return results, summary
+
+
+def print_inventory(result):
+    """Prints a report like extract_distinct_dxftypes.py used to."""
+    print(result["dxf_file"])
+    if result["status"] != "ok":
+        print(f"  FAILED: {result['error']}")
+        return
+    print(f"  {result['dxfversion']}, {result['entities']} modelspace entities, {len(result['blocks'])} blocks ({result['seconds']:.3f}s)")
+    print("  Entity types: " + ", ".join(f"{entity_type}: {count}" for entity_type, count in result["types"].items()))
+    print("  Layers: " + ", ".join(f"{layer}: {count}" for layer, count in result["layers"].items()))
+    for block_name, block in result["blocks"].items():
+        if block["attdefs"]:
+            print(f"  Block {block_name} attributes: {', '.join(block['attdefs'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Counts the entities of DXF files per type, layer and block without loading them with ezdxf.")
+    parser.add_argument("inputs", nargs="+", help="DXF files, directories or glob patterns (e.g. 'kruispunten/**/*.dxf')")
+    parser.add_argument("-o", "--output", help="write the per-file reports and summary as JSON to this file ('-' for stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the per-file reports")
+    args = parser.parse_args(argv)
+
+    dxf_files = find_dxf_files(args.inputs)
+    if not dxf_files:
+        print("No DXF files found.", file=sys.stderr)
+        return 1
+
+    results, summary = inventory_batch(dxf_files, workers=args.workers)
+
+    # keep stdout clean when it carries the JSON report
+    log = sys.stderr if args.output == "-" else sys.stdout
+    if not args.quiet and args.output != "-":
+        for result in results:
+            print_inventory(result)
+        print()
+    print(f"Scanned {summary['scanned']}/{summary['files']} files ({summary['failed']} failed) in {summary['seconds']:.2f}s, "
+          f"{summary['files_per_second']:.1f} files/s", file=log)
+
+    if args.output:
+        report = {"summary": summary, "results": results}
+        if args.output == "-":
+            json.dump(report, sys.stdout, indent=4)
+        else:
+            with open(args.output, "w") as report_file:
+                json.dump(report, report_file, indent=4)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Extraction-time filters for dxf2model: entities are tested on their raw ezdxf attributes before any attribute
+conversion, and blocks that are only inserted by filtered out INSERTs are never processed.
+
+- layers / exclude_layers: layer name patterns (case insensitive, * and ? wildcards) for the modelspace
+  entities; block contents keep their own layers, which usually are '0' and inherit the layer of the INSERT
+- types / exclude_types: DXF types, for the modelspace and the block contents (ATTDEFs are kept with their block)
+- blocks / exclude_blocks: block name patterns of the INSERTs in the modelspace
+- bbox: (min_x, min_y, max_x, max_y), modelspace entities whose extents do not overlap it are dropped
+"""
+import fnmatch
+
+from transform import Affine
+
+
+def _patterns(names):
+    return tuple(name.casefold() for name in names) if names else None
+
+
+class EntityFilter:
+    def __init__(self, layers=None, exclude_layers=None, types=None, exclude_types=None,
+                 blocks=None, exclude_blocks=None, bbox=None):
+        self.layers = _patterns(layers)
+        self.exclude_layers = _patterns(exclude_layers)
+        self.types = frozenset(t.upper() for t in types) if types else None
+        self.exclude_types = frozenset(t.upper() for t in exclude_types) if exclude_types else frozenset()
+        self.blocks = _patterns(blocks)
+        self.exclude_blocks = _patterns(exclude_blocks)
+        self.bbox = tuple(bbox) if bbox else None
+        self._layer_matches = {}
+        self._block_matches = {}
+        self._block_extents = {}
+        self._doc_blocks = None
+
+    def to_dict(self):
+        """Description of the filter, e.g. for the key of the conversion cache."""
+        return {
+            "layers": self.layers, "exclude_layers": self.exclude_layers,
+            "types": sorted(self.types) if self.types else None, "exclude_types": sorted(self.exclude_types),
+            "blocks": self.blocks, "exclude_blocks": self.exclude_blocks, "bbox": self.bbox,
+        }
+
+    def bind(self, doc):
+        """Gives access to the block definitions, which the bbox test of INSERTs needs."""
+        self._doc_blocks = doc.blocks
+        return self
+
+    @staticmethod
+    def _match(name, include, exclude, cache):
+        matches = cache.get(name)
+        if matches is None:
+            folded = name.casefold()
+            matches = cache[name] = (
+                (include is None or any(fnmatch.fnmatchcase(folded, p) for p in include))
+                and not (exclude and any(fnmatch.fnmatchcase(folded, p) for p in exclude))
+            )
+        return matches
+
+    def accepts_type(self, dxftype, in_block=False):
+        if in_block and dxftype == "ATTDEF":
+            return True
+        return (self.types is None or dxftype in self.types) and dxftype not in self.exclude_types
+
+    def accepts_block(self, name):
+        return self._match(name, self.blocks, self.exclude_blocks, self._block_matches)
+
+    def accepts(self, entity, in_block=False):
+        """Tests a raw ezdxf entity of the modelspace (or with in_block, of a block definition)."""
+        dxftype = entity.dxftype()
+        if not self.accepts_type(dxftype, in_block):
+            return False
+        if in_block:
+            return True
+        dxf = entity.dxf
+        if not self._match(dxf.layer, self.layers, self.exclude_layers, self._layer_matches):
+            return False
+        if dxftype == "INSERT" and not self.accepts_block(dxf.name):
+            return False
+        if self.bbox is not None:
+            extents = self.extents(entity)
+            if extents is not None:
+                min_x, min_y, max_x, max_y = self.bbox
+                if extents[0] > max_x or extents[2] < min_x or extents[1] > max_y or extents[3] < min_y:
+                    return False
+        return True
+
+    def extents(self, entity, visiting=None):
+        """Cheap bounding box from the raw DXF attributes, None when unknown (the entity is then kept)."""
+        dxftype = entity.dxftype()
+        dxf = entity.dxf
+        if dxftype == "POINT":
+            points = [dxf.location]
+        elif dxftype in ("TEXT", "ATTRIB"):
+            points = [dxf.insert]
+        elif dxftype == "LINE":
+            points = [dxf.start, dxf.end]
+        elif dxftype == "SOLID":
+            points = [dxf.vtx0, dxf.vtx1, dxf.vtx2, dxf.get("vtx3", dxf.vtx2)]
+        elif dxftype == "POLYLINE":
+            points = [vertex.dxf.location for vertex in entity.vertices]
+        elif dxftype == "LWPOLYLINE":
+            points = [point[:2] for point in entity.get_points()]
+        elif dxftype in ("CIRCLE", "ARC"):
+            x, y, r = dxf.center[0], dxf.center[1], dxf.radius
+            return x - r, y - r, x + r, y + r
+        elif dxftype == "INSERT":
+            return self.insert_extents(entity, visiting)
+        else:
+            return None
+        if not points:
+            return None
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def insert_extents(self, insert, visiting=None):
+        x, y = insert.dxf.insert[0], insert.dxf.insert[1]
+        bboxes = [(x, y, x, y)]
+        block_extents = self.block_extents(insert.dxf.name, visiting if visiting is not None else set())
+        if block_extents is not None:
+            transform = Affine.from_insert((insert.dxf.get("xscale", 1.0), insert.dxf.get("yscale", 1.0)),
+                                           insert.dxf.get("rotation", 0.0), (x, y))
+            min_x, min_y, max_x, max_y = block_extents
+            corners = transform.apply([(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)])
+            bboxes.append((min(c[0] for c in corners), min(c[1] for c in corners),
+                           max(c[0] for c in corners), max(c[1] for c in corners)))
+        for attrib in insert.attribs:
+            bboxes.append(self.extents(attrib))
+        return (min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+                max(b[2] for b in bboxes), max(b[3] for b in bboxes))
+
+    def block_extents(self, name, visiting):
+        """Extents of a block definition in its own coordinates, memoized per block."""
+        if name in self._block_extents:
+            return self._block_extents[name]
+        if self._doc_blocks is None or name in visiting or name not in self._doc_blocks:
+            return None
+        visiting.add(name)
+        bboxes = []
+        for entity in self._doc_blocks.get(name):
+            extents = self.extents(entity, visiting)
+            if extents is not None:
+                bboxes.append(extents)
+        extents = None
+        if bboxes:
+            extents = (min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+                       max(b[2] for b in bboxes), max(b[3] for b in bboxes))
+        self._block_extents[name] = extents
+        return extents
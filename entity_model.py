@@ -0,0 +1,241 @@
+"""
+Slotted in-memory records of the converted entities, the model that the renderers work on.
+
+A record keeps the attributes of its type (the properties of schema.json) in __slots__ instead of a dict per
+entity: its DXF type is a class attribute, layer, linetype, block and tag names are interned so all records of a
+layer share one string, a single point is an (x, y) tuple, and the vertices of LINEs, POLYLINEs and SOLIDs and
+the bounding boxes are packed into arrays of doubles instead of a float object per number. Attributes that schema.json does not describe (e.g. 'flags',
+'elevation', 'owner') are kept in the 'extra' dict, None when there are none. Missing attributes are None.
+
+    record = from_dict(item)   # a record of dxf_entities.json(l), BLOCK records included
+    item = record.to_dict()    # and back, in the form of schema.json
+
+Records are created from the JSON records (or the records of a conversion in memory, see dxf2model.convert_model)
+and are pickled with the render model.
+"""
+import sys
+from array import array
+
+_intern = sys.intern
+
+
+def _point(value):
+    return (value[0], value[1])
+
+
+def _packed_points(value):
+    """The points as x0, y0, x1, y1, ... in an array of doubles."""
+    return array('d', [coordinate for point in value for coordinate in (point[0], point[1])])
+
+
+class Record:
+    __slots__ = ("id", "bbox", "extra")
+
+    type = None
+    # the JSON attributes of the type besides 'type', in the order of to_dict; the rest goes into extra
+    FIELDS = ("id",)
+    # the FIELDS whose strings are interned
+    INTERNED = ()
+
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        cls._field_set = frozenset(cls.FIELDS) | {"bbox"}
+
+    @classmethod
+    def from_dict(cls, item):
+        record = cls.__new__(cls)
+        for name in cls.FIELDS:
+            setattr(record, name, None)
+        record.bbox = None
+        fields = cls._field_set
+        extra = None
+        for key, value in item.items():
+            if key in fields:
+                setattr(record, key, value)
+            elif key == "type":
+                continue
+            elif extra is None:
+                extra = {key: value}
+            else:
+                extra[key] = value
+        record.extra = extra
+        for name in cls.INTERNED:
+            value = getattr(record, name)
+            if value.__class__ is str:
+                setattr(record, name, _intern(value))
+        if record.bbox is not None:
+            record.bbox = array('d', record.bbox)
+        record._adapt()
+        return record
+
+    def _adapt(self):
+        """Converts the JSON values that the type stores differently, e.g. points to tuples."""
+
+    def to_dict(self):
+        item = {"type": self.type}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                item[name] = value
+        self._export(item)
+        if self.extra:
+            item.update(self.extra)
+        if self.bbox is not None:
+            item["bbox"] = list(self.bbox)
+        return item
+
+    def _export(self, item):
+        """Converts the values that _adapt converted back to their JSON form."""
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.type} {self.id}>"
+
+
+class Entity(Record):
+    __slots__ = ("layer", "linetype", "color", "coordinates")
+
+    FIELDS = ("id", "layer", "linetype", "color", "coordinates")
+    INTERNED = ("layer", "linetype")
+
+    def _adapt(self):
+        if self.coordinates is not None:
+            self.coordinates = _point(self.coordinates)
+
+    def _export(self, item):
+        if self.coordinates is not None:
+            item["coordinates"] = list(self.coordinates)
+
+
+class MultiPointEntity(Entity):
+    """An entity with a list of vertices, packed into its coordinates array (see points)."""
+
+    __slots__ = ()
+
+    def _adapt(self):
+        if self.coordinates is not None:
+            self.coordinates = _packed_points(self.coordinates)
+
+    def points(self):
+        """The vertices as a new list of (x, y) tuples."""
+        coordinates = self.coordinates
+        if coordinates is None:
+            return []
+        values = iter(coordinates)
+        return list(zip(values, values))
+
+    def _export(self, item):
+        if self.coordinates is not None:
+            item["coordinates"] = [list(point) for point in self.points()]
+
+
+class Point(Entity):
+    __slots__ = ()
+    type = "POINT"
+
+
+class Line(MultiPointEntity):
+    __slots__ = ()
+    type = "LINE"
+
+
+class Polyline(MultiPointEntity):
+    __slots__ = ("is_closed",)
+    type = "POLYLINE"
+    FIELDS = Entity.FIELDS + ("is_closed",)
+
+
+class LWPolyline(Polyline):
+    __slots__ = ()
+    type = "LWPOLYLINE"
+
+
+class Solid(MultiPointEntity):
+    __slots__ = ()
+    type = "SOLID"
+
+
+class Circle(Entity):
+    __slots__ = ("radius",)
+    type = "CIRCLE"
+    FIELDS = Entity.FIELDS + ("radius",)
+
+
+class Arc(Circle):
+    __slots__ = ("start_angle", "end_angle")
+    type = "ARC"
+    FIELDS = Circle.FIELDS + ("start_angle", "end_angle")
+
+
+class Text(Entity):
+    __slots__ = ("text", "height", "rotation", "width", "style")
+    type = "TEXT"
+    FIELDS = Entity.FIELDS + ("text", "height", "rotation", "width", "style")
+    INTERNED = Entity.INTERNED + ("style",)
+
+
+class Attdef(Entity):
+    __slots__ = ("tag", "text", "prompt", "height", "rotation", "style")
+    type = "ATTDEF"
+    FIELDS = Entity.FIELDS + ("tag", "text", "prompt", "height", "rotation", "style")
+    INTERNED = Entity.INTERNED + ("tag", "style")
+
+
+class Attrib(Entity):
+    __slots__ = ("tag", "text", "height", "rotation", "style")
+    type = "ATTRIB"
+    FIELDS = Entity.FIELDS + ("tag", "text", "height", "rotation", "style")
+    INTERNED = Entity.INTERNED + ("tag", "style")
+
+
+class Insert(Entity):
+    __slots__ = ("name", "xscale", "yscale", "rotation", "attribs", "attribs_by_tag")
+    type = "INSERT"
+    FIELDS = Entity.FIELDS + ("name", "xscale", "yscale", "rotation", "attribs")
+    INTERNED = Entity.INTERNED + ("name",)
+
+    def _adapt(self):
+        super()._adapt()
+        attribs = tuple([Attrib.from_dict(attrib) for attrib in self.attribs]) if self.attribs else ()
+        self.attribs = attribs
+        # the ATTRIBs by tag for drawing them per ATTDEF; with duplicate tags the first ATTRIB wins
+        attribs_by_tag = {}
+        for attrib in attribs:
+            attribs_by_tag.setdefault(attrib.tag, attrib)
+        self.attribs_by_tag = attribs_by_tag
+
+    def _export(self, item):
+        super()._export(item)
+        item["attribs"] = [attrib.to_dict() for attrib in self.attribs]
+
+
+class Block(Record):
+    __slots__ = ("block_name", "entities")
+    type = "BLOCK"
+    FIELDS = ("id", "block_name", "entities")
+    INTERNED = ("block_name",)
+
+    def _adapt(self):
+        self.entities = [from_dict(entity) for entity in self.entities or ()]
+
+    def _export(self, item):
+        item["entities"] = [entity.to_dict() for entity in self.entities]
+
+
+class OtherEntity(Entity):
+    """An entity of a type without a class of its own, its type is stored per record."""
+
+    __slots__ = ("type",)
+
+    @classmethod
+    def from_dict(cls, item):
+        record = super().from_dict(item)
+        record.type = _intern(item["type"])
+        return record
+
+
+RECORD_TYPES = {cls.type: cls for cls in (Point, Line, Polyline, LWPolyline, Solid, Circle, Arc, Text, Attdef, Attrib, Insert, Block)}
+
+
+def from_dict(item):
+    """The record of a JSON record (a dict as in schema.json)."""
+    return RECORD_TYPES.get(item["type"], OtherEntity).from_dict(item)
@@ -0,0 +1,192 @@
+"""
+Explodes the INSERTs of the converted records into world space primitives, the way data2svg.draw_insert places them:
+nested INSERTs, xscale/yscale and rotation are resolved once at conversion time, so consumers get plain geometry.
+
+Every block is flattened once into its own coordinates (nested INSERTs included) and memoized; an INSERT of that
+block then costs a single batched transformation of all its points. The ATTRIBs of an INSERT become TEXT entities
+in ATTDEF order, block entities on layer '0' take the layer of their INSERT and the id of an exploded entity is the
+path of INSERT ids down to the id of the block entity, e.g. '4A/37/36'.
+An INSERT with different x and y scales turns the circles and arcs of its block into ellipses, which are
+flattened into POLYLINEs; its texts keep their height along the y axis and their width factor follows x.
+"""
+import math
+
+from transform import Affine
+
+SINGLE_POINT_TYPES = ('POINT', 'TEXT', 'ATTRIB', 'CIRCLE', 'ARC')
+MULTI_POINT_TYPES = ('LINE', 'POLYLINE', 'LWPOLYLINE', 'SOLID')
+# segments of a full circle when a non-uniformly scaled CIRCLE or ARC is flattened into a POLYLINE
+FLATTEN_SEGMENTS = 72
+
+
+def _scaled(value, factor):
+    """Scales a numeric attribute, which the converter stores as float or as str (e.g. height '0.3')."""
+    if isinstance(value, str):
+        return str(float(value) * factor)
+    return value * factor
+
+
+def arc_points(x, y, radius, start_angle=0.0, end_angle=360.0):
+    """
+    Points along a counterclockwise arc (angles in degrees) and whether it is closed: a sweep of 0 is the full
+    circle, whose start point is not repeated.
+    """
+    sweep = (end_angle - start_angle) % 360.0
+    closed = sweep == 0.0
+    if closed:
+        sweep = 360.0
+    count = max(2, math.ceil(FLATTEN_SEGMENTS * sweep / 360.0))
+    angles = [math.radians(start_angle + sweep * i / count) for i in range(count if closed else count + 1)]
+    return [[x + radius * math.cos(angle), y + radius * math.sin(angle)] for angle in angles], closed
+
+
+def flatten_arc(entity, template, transform):
+    """Turns the CIRCLE or ARC entity into the POLYLINE of its (block coordinates) template under transform."""
+    x, y = template['coordinates']
+    if entity['type'] == 'ARC':
+        points, closed = arc_points(x, y, template['radius'], template.get('start_angle', 0.0), template.get('end_angle', 360.0))
+    else:
+        points, closed = arc_points(x, y, template['radius'])
+    for key in ('radius', 'start_angle', 'end_angle'):
+        entity.pop(key, None)
+    entity['type'] = 'POLYLINE'
+    entity['coordinates'] = transform.apply(points)
+    entity['is_closed'] = closed
+
+
+class FlatBlock:
+    """A block with its nested INSERTs resolved: entity dicts without coordinates plus all their points in one list."""
+
+    __slots__ = ("templates", "points", "spans")
+
+    def __init__(self):
+        self.templates = []
+        self.points = []
+        self.spans = []  # (start, stop) into points, stop is None for a single point entity
+
+    def add(self, entity):
+        coordinates = entity.get('coordinates')
+        template = dict(entity)
+        template.pop('bbox', None)  # in block coordinates, see bounds.add_bboxes
+        start = len(self.points)
+        if entity['type'] in SINGLE_POINT_TYPES and coordinates is not None:
+            self.points.append(coordinates)
+            span = (start, None)
+        elif entity['type'] in MULTI_POINT_TYPES and coordinates is not None:
+            self.points.extend(coordinates)
+            span = (start, len(self.points))
+        else:
+            span = None
+        self.templates.append(template)
+        self.spans.append(span)
+
+
+class Exploder:
+    def __init__(self, blocks):
+        """blocks: the entity lists of the block definitions by block name, as in the BLOCK records."""
+        self.blocks = blocks
+        self._flat_blocks = {}
+
+    def flat_block(self, name, visiting=None):
+        """The memoized flattened block, None for unknown blocks (and for INSERTs that would recurse)."""
+        if name in self._flat_blocks:
+            return self._flat_blocks[name]
+        visiting = visiting if visiting is not None else set()
+        if name not in self.blocks or name in visiting:
+            return None
+        visiting.add(name)
+        flat = FlatBlock()
+        for entity in self.blocks[name]:
+            if entity['type'] == 'ATTDEF':
+                continue  # replaced by the ATTRIBs of the INSERT
+            if entity['type'] == 'INSERT':
+                for exploded in self.explode(entity, visiting):
+                    flat.add(exploded)
+            else:
+                flat.add(entity)
+        visiting.discard(name)
+        self._flat_blocks[name] = flat
+        return flat
+
+    def explode(self, insert, visiting=None):
+        """Returns the entities of an INSERT in the coordinates of the INSERT's parent (the world for modelspace INSERTs)."""
+        name = insert['name']
+        flat = self.flat_block(name, visiting)
+        if flat is None:
+            return []  # Block definition not found, data2svg does not draw these either
+        transform = Affine.from_entity(insert)
+        exploded = self.attrib_texts(insert)
+        exploded.extend(self.instantiate(flat, transform, insert['id'], insert.get('layer', '0')))
+        return exploded
+
+    def attrib_texts(self, insert):
+        """The ATTRIBs of an INSERT as TEXT entities, in the order of the ATTDEFs of its block (see data2svg.draw_attribs)."""
+        attribs = {attrib['tag']: attrib for attrib in insert.get('attribs', ())}
+        texts = []
+        if not attribs:
+            return texts
+        for attdef in self.blocks[insert['name']]:
+            if attdef['type'] == 'ATTDEF' and attdef['tag'] in attribs:
+                text = dict(attribs[attdef['tag']], type='TEXT')
+                text.setdefault('text', attdef.get('text', ''))
+                text.setdefault('height', attdef.get('height', 10))
+                texts.append(text)
+        return texts
+
+    @staticmethod
+    def instantiate(flat, transform, insert_id, insert_layer):
+        """Places the flattened block with one batched transformation of all its points."""
+        points = transform.apply(flat.points) if flat.points else []
+        rotation = transform.rotation
+        x_scale, y_scale = transform.scale
+        uniform = math.isclose(x_scale, y_scale)
+        mirrored = transform.a * transform.d - transform.b * transform.c < 0
+
+        entities = []
+        for template, span in zip(flat.templates, flat.spans):
+            entity = dict(template)
+            entity['id'] = f"{insert_id}/{template['id']}"
+            if entity.get('layer') == '0':
+                entity['layer'] = insert_layer
+            if span is not None:
+                start, stop = span
+                entity['coordinates'] = points[start] if stop is None else points[start:stop]
+            dxftype = entity['type']
+            if dxftype in ('CIRCLE', 'ARC') and not uniform:
+                flatten_arc(entity, template, transform)  # an ellipse (arc)
+            elif dxftype in ('CIRCLE', 'ARC'):
+                entity['radius'] = _scaled(entity['radius'], x_scale)
+                if dxftype == 'ARC':
+                    if mirrored:
+                        entity['start_angle'], entity['end_angle'] = rotation - template['end_angle'], rotation - template['start_angle']
+                    else:
+                        entity['start_angle'] = template['start_angle'] + rotation
+                        entity['end_angle'] = template['end_angle'] + rotation
+            elif dxftype in ('TEXT', 'ATTRIB'):
+                entity['rotation'] = template.get('rotation', 0.0) + rotation
+                if 'height' in entity:
+                    entity['height'] = _scaled(entity['height'], y_scale)
+                if not uniform:
+                    # the glyphs are stretched along x relative to the height
+                    entity['width'] = _scaled(entity.get('width', 1.0), x_scale / y_scale)
+            entities.append(entity)
+        return entities
+
+
+def explode_records(records):
+    """
+    Passes the records through with the INSERTs replaced by their exploded entities.
+    The BLOCK records, which the converter yields first, are consumed and not passed on.
+    """
+    blocks = {}
+    exploder = None
+    for item in records:
+        if item['type'] == 'BLOCK':
+            blocks[item['block_name']] = item['entities']
+            continue
+        if item['type'] == 'INSERT':
+            if exploder is None:
+                exploder = Exploder(blocks)
+            yield from exploder.explode(item)
+        else:
+            yield item
@@ -0,0 +1,151 @@
+"""
+Instrumentation of a conversion or render: timing spans (per stage and per entity type), counters, peak memory
+and an optional cProfile dump.
+
+    metrics = Metrics()
+    metrics.add_hook(lambda kind, name, value: print(kind, name, value))  # e.g. forward to a monitoring system
+    dxf2model.convert_file("plan.dxf", "output", metrics=metrics)
+    print(metrics.report())
+
+Hooks are called with ("span", name, seconds) when a span ends and with ("count", name, increment) for counters.
+Spans with the same name add up; per entity type spans are added once per block and once for the modelspace.
+"""
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class Metrics:
+    def __init__(self, trace_memory=False, profile=False, hooks=()):
+        """
+        trace_memory: measure the peak of the memory allocated by Python with tracemalloc (slows things down)
+        profile: run the instrumented code under cProfile, see dump_profile
+        """
+        self.spans = {}  # name: [seconds, calls]
+        self.counters = {}
+        self.hooks = list(hooks)
+        self.trace_memory = trace_memory
+        self.profiler = cProfile.Profile() if profile else None
+        self.peak_memory = None
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def add_time(self, name, seconds, calls=1):
+        span = self.spans.get(name)
+        if span is None:
+            self.spans[name] = [seconds, calls]
+        else:
+            span[0] += seconds
+            span[1] += calls
+        for hook in self.hooks:
+            hook("span", name, seconds)
+
+    def count(self, name, increment=1):
+        self.counters[name] = self.counters.get(name, 0) + increment
+        for hook in self.hooks:
+            hook("count", name, increment)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    @contextmanager
+    def measure(self, name):
+        """The outermost span of a run: also starts tracemalloc and the profiler when they were requested."""
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profiler is not None:
+            self.profiler.enable()
+        try:
+            with self.span(name):
+                yield
+        finally:
+            if self.profiler is not None:
+                self.profiler.disable()
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                self.peak_memory = max(self.peak_memory or 0, peak)
+                tracemalloc.stop()
+
+    def dump_profile(self, profile_file):
+        """Writes the cProfile statistics, to be read with pstats or a viewer like snakeviz."""
+        self.profiler.dump_stats(profile_file)
+
+    def report(self):
+        report = {
+            "spans": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.spans.items()},
+            "counters": dict(self.counters),
+        }
+        if self.peak_memory is not None:
+            report["peak_traced_memory"] = self.peak_memory
+        if resource is not None:
+            # kilobytes on Linux, bytes on macOS
+            report["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return report
+
+
+def add_arguments(parser):
+    """The --metrics, --trace-memory and --profile options of the command line tools."""
+    group = parser.add_argument_group("metrics")
+    group.add_argument("--metrics", metavar="FILE", help="write the timing spans, counters and peak memory as JSON to FILE ('-' for stderr)")
+    group.add_argument("--trace-memory", action="store_true", help="include the peak memory traced with tracemalloc in the metrics (slower)")
+    group.add_argument("--profile", metavar="FILE", help="run under cProfile and dump the statistics to FILE")
+
+
+def from_arguments(args):
+    """The Metrics for the parsed command line options, None when nothing was requested."""
+    if not (args.metrics or args.profile):
+        return None
+    return Metrics(trace_memory=args.trace_memory, profile=bool(args.profile))
+
+
+def write_outputs(metrics, args, **extra):
+    """Writes the report (with the extra entries) and the profile that the command line options asked for."""
+    if metrics is None:
+        return
+    if args.metrics:
+        report = dict(extra, **metrics.report())
+        if args.metrics == "-":
+            json.dump(report, sys.stderr, indent=4)
+            sys.stderr.write("\n")
+        else:
+            with open(args.metrics, "w") as report_file:
+                json.dump(report, report_file, indent=4)
+    if args.profile:
+        metrics.dump_profile(args.profile)
+
+
+class EntityTimer:
+    """Collects the extraction time and count per entity type locally and adds them to the Metrics at the end."""
+
+    __slots__ = ("metrics", "prefix", "seconds", "counts")
+
+    def __init__(self, metrics, prefix):
+        self.metrics = metrics
+        self.prefix = prefix
+        self.seconds = {}
+        self.counts = {}
+
+    def add(self, dxftype, seconds):
+        self.seconds[dxftype] = self.seconds.get(dxftype, 0.0) + seconds
+        self.counts[dxftype] = self.counts.get(dxftype, 0) + 1
+
+    def flush(self):
+        for dxftype, seconds in self.seconds.items():
+            self.metrics.add_time(f"{self.prefix}.{dxftype}", seconds, self.counts[dxftype])
+        self.seconds.clear()
+        self.counts.clear()
@@ -0,0 +1,184 @@
+"""
+Preprocessed model of a converted plan for the renderers, built once and reused for every render.
+
+- the entities are slotted records (see entity_model) instead of the dicts of the JSON records
+- every block is split into its ATTDEFs (in drawing order) and the entities that are drawn
+- the ATTRIBs of every INSERT (modelspace and nested) are indexed by tag in its 'attribs_by_tag' attribute
+
+so drawing the attributes of an INSERT is a dictionary lookup per ATTDEF instead of a scan of all its ATTRIBs.
+The model can be pickled next to its input file and is reused as long as the input does not change.
+RenderModel.open reads only the BLOCK records of a JSONL file up front and streams the modelspace entities
+from the file whenever they are iterated, so memory does not grow with the number of entities.
+"""
+import math
+import os
+import pickle
+
+from bounds import compute_block_bboxes, entity_bbox
+from entity_model import Record, from_dict
+from serializer import iter_jsonl, iter_records, loads
+
+# Bump when the model changes, this invalidates the pickled models
+RENDER_MODEL_VERSION = 3
+
+
+class RenderBlock:
+    __slots__ = ("name", "entities", "attdefs", "bbox")
+
+    def __init__(self, name, entities=None, attdefs=None, bbox=None):
+        self.name = name
+        self.entities = entities if entities is not None else []
+        self.attdefs = attdefs if attdefs is not None else []
+        self.bbox = bbox  # in block coordinates, as stored by the converter
+
+    @classmethod
+    def from_entities(cls, name, block_entities, bbox=None):
+        """The block of its entities, records or the dicts of a BLOCK record."""
+        block = cls(name, bbox=bbox)
+        for entity in block_entities:
+            entity = as_record(entity)
+            if entity.type == 'ATTDEF':
+                block.attdefs.append(entity)
+            else:
+                block.entities.append(entity)
+        return block
+
+    @classmethod
+    def from_record(cls, block):
+        """The block of a BLOCK record (entity_model.Block)."""
+        return cls.from_entities(block.block_name, block.entities, block.bbox)
+
+
+def as_record(item):
+    """The record of a JSON record, records are returned as they are."""
+    return item if isinstance(item, Record) else from_dict(item)
+
+
+class RenderModel:
+    __slots__ = ("blocks", "entities", "_bounds")
+
+    def __init__(self, blocks, entities):
+        self.blocks = blocks  # RenderBlock by block name
+        self.entities = entities  # modelspace entities, in drawing order
+        self._bounds = None
+
+    def bounds(self):
+        """
+        (min_x, min_y, max_x, max_y) of the modelspace, None when it has no geometry. Merged once from the 'bbox'
+        entries that the converter stored (computed for conversions without them) and pickled with the model.
+        """
+        if self._bounds is None:
+            block_bboxes = None
+            min_x = min_y = math.inf
+            max_x = max_y = -math.inf
+            for entity in self.entities:
+                bbox = entity.bbox
+                if bbox is None:
+                    if block_bboxes is None:
+                        block_bboxes = compute_block_bboxes(
+                            {name: [e.to_dict() for e in block.entities] for name, block in self.blocks.items()})
+                    bbox = entity_bbox(entity.to_dict(), block_bboxes)
+                    if bbox is None:
+                        continue
+                if bbox[0] < min_x:
+                    min_x = bbox[0]
+                if bbox[1] < min_y:
+                    min_y = bbox[1]
+                if bbox[2] > max_x:
+                    max_x = bbox[2]
+                if bbox[3] > max_y:
+                    max_y = bbox[3]
+            self._bounds = (min_x, min_y, max_x, max_y) if min_x <= max_x else ()
+        return self._bounds or None
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds the model from the records of dxf_entities.json(l) or of a conversion in memory: BLOCK records and
+        modelspace entities, as dicts or records. The dicts are converted one at a time, so a generator of records
+        is never held in memory as dicts.
+        """
+        blocks = {}
+        entities = []
+        for item in records:
+            item = as_record(item)
+            if item.type == 'BLOCK':
+                blocks[item.block_name] = RenderBlock.from_record(item)
+            else:
+                entities.append(item)
+        return cls(blocks, entities)
+
+    @classmethod
+    def open(cls, input_file):
+        """
+        The model of a dxf_entities.jsonl file with its modelspace entities left in the file (see LazyEntities),
+        .json files are loaded completely.
+        """
+        if not input_file.endswith('.jsonl'):
+            return cls.load(input_file)
+        blocks = {}
+        offset = 0
+        with open(input_file, 'rb') as f:
+            # the BLOCK records come first, the entities start at the first other record
+            for line in iter(f.readline, b''):
+                if line.strip():
+                    item = loads(line)
+                    if item['type'] != 'BLOCK':
+                        break
+                    block = from_dict(item)
+                    blocks[block.block_name] = RenderBlock.from_record(block)
+                offset = f.tell()
+        return cls(blocks, LazyEntities(input_file, offset))
+
+    @classmethod
+    def load(cls, input_file, cache_file=None):
+        """
+        Loads the model of a dxf_entities.json or .jsonl file. With a cache_file, the pickled model is used
+        when it was built from the same version of the input, otherwise the model is built and pickled to it.
+        """
+        source = _source_stamp(input_file)
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, 'rb') as f:
+                version, cached_source, model = pickle.load(f)
+            if version == RENDER_MODEL_VERSION and cached_source == source:
+                return model
+
+        model = cls.from_records(iter_records(input_file))
+        if cache_file:
+            model.bounds()  # the view box is cached with the model
+            model.save(cache_file, source)
+        return model
+
+    def save(self, cache_file, source=None):
+        temp_file = f"{cache_file}.tmp"
+        with open(temp_file, 'wb') as f:
+            pickle.dump((RENDER_MODEL_VERSION, source, self), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+
+
+class LazyEntities:
+    """
+    The modelspace entities of a JSONL file from the given byte offset on, read from the file (and converted to
+    records) on every iteration.
+    """
+
+    __slots__ = ("input_file", "offset")
+
+    def __init__(self, input_file, offset):
+        self.input_file = input_file
+        self.offset = offset
+
+    def __iter__(self):
+        with open(self.input_file, 'rb') as f:
+            f.seek(self.offset)
+            for item in iter_jsonl(f):
+                yield from_dict(item)
+
+
+def _source_stamp(input_file):
+    stat = os.stat(input_file)
+    return os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns
+
+
+def default_cache_file(input_file):
+    return f"{input_file}.render-model.pickle"
@@ -0,0 +1,142 @@
+"""
+JSON serialization of the records, with a pluggable backend: orjson when it is installed (several times faster
+for both reading and writing), the standard library json module otherwise. Output is compact by default,
+indent=True gives the indented form for people reading the files.
+
+Records are written to and read from binary files; JSONL files are read lazily, line by line.
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class JsonBackend:
+    name = "json"
+
+    @staticmethod
+    def dumps(obj, indent=False, sort_keys=False):
+        if indent:
+            return json.dumps(obj, indent=4, sort_keys=sort_keys).encode()
+        return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode()
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    name = "orjson"
+
+    @staticmethod
+    def dumps(obj, indent=False, sort_keys=False):
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+BACKENDS = {"json": JsonBackend}
+if orjson is not None:
+    BACKENDS["orjson"] = OrjsonBackend
+
+# DXF_JSON_BACKEND=json forces the standard library, e.g. to compare the backends
+_backend = BACKENDS.get(os.environ.get("DXF_JSON_BACKEND", ""), OrjsonBackend if orjson is not None else JsonBackend)
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(name):
+    """Selects the backend by name ('json' or 'orjson'), raises ValueError when it is not available."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend {name!r} is not available, choose from {', '.join(BACKENDS)}")
+    _backend = BACKENDS[name]
+
+
+def dumpb(obj, indent=False, sort_keys=False):
+    """Serializes obj to JSON bytes."""
+    return _backend.dumps(obj, indent, sort_keys)
+
+
+def loads(data):
+    """Parses JSON from bytes or str."""
+    return _backend.loads(data)
+
+
+def write_json(records, json_file, indent=False):
+    """
+    Writes the records as a JSON array to a binary file. Compact output is written record by record,
+    so records can be a generator; the indented form serializes the whole list at once.
+    """
+    if indent:
+        json_file.write(dumpb(list(records), indent=True))
+        return
+    json_file.write(b"[")
+    for i, item in enumerate(records):
+        if i:
+            json_file.write(b",")
+        json_file.write(dumpb(item))
+    json_file.write(b"]")
+
+
+def write_jsonl(records, jsonl_file):
+    """Writes each record as soon as it is produced to a binary file and returns the number of records written."""
+    count = 0
+    for item in records:
+        jsonl_file.write(dumpb(item))
+        jsonl_file.write(b"\n")  # Write a newline after each JSON object
+        count += 1
+    return count
+
+
+def write_json_and_jsonl(records, json_file, jsonl_file, indent=False):
+    """
+    Writes the records both as a JSON array and as JSONL in a single pass. In the compact form every record
+    is serialized once for both files and nothing is kept in memory. Returns the number of records written.
+    """
+    if indent:
+        records = list(records)
+        write_json(records, json_file, indent=True)
+        return write_jsonl(records, jsonl_file)
+    count = 0
+    json_file.write(b"[")
+    for item in records:
+        data = dumpb(item)
+        if count:
+            json_file.write(b",")
+        json_file.write(data)
+        jsonl_file.write(data)
+        jsonl_file.write(b"\n")
+        count += 1
+    json_file.write(b"]")
+    return count
+
+
+def iter_jsonl(jsonl_file):
+    """Lazily yields the records of a JSONL file object, one line at a time."""
+    loads = _backend.loads
+    for line in jsonl_file:
+        if line.strip():
+            yield loads(line)
+
+
+def iter_records(input_file):
+    """Yields the records of a dxf_entities.jsonl file lazily, or of a dxf_entities.json file after loading it."""
+    with open(input_file, "rb") as f:
+        if input_file.endswith(".jsonl"):
+            yield from iter_jsonl(f)
+        else:
+            yield from loads(f.read())
+
+
+def load_records(input_file):
+    """All records of a dxf_entities.json or .jsonl file as a list."""
+    return list(iter_records(input_file))
@@ -0,0 +1,323 @@
+"""
+Optional optimization of the converted records between the extraction and the writers, for survey-derived plans
+with long runs of near-collinear vertices, overlapping duplicates and zero-length segments:
+
+- decimals: coordinates are rounded to this number of decimals (quantization)
+- zero-length LINEs are dropped, as are repeated vertices of POLYLINEs and LWPOLYLINEs
+- tolerance: POLYLINEs and LWPOLYLINEs are simplified with Douglas-Peucker, no vertex moves further than
+  tolerance; 3D meshes and polyface meshes are left alone
+- deduplicate: entities with the same type, attributes and geometry (ids aside) are kept once; with a tolerance
+  geometry that snaps to the same tolerance grid counts as the same (near duplicates)
+- merge_lines: chains of LINEs with the same layer and style are merged into POLYLINEs with 'merged_ids',
+  chains end where more than two LINEs meet
+
+The block contents and the modelspace are optimized separately. Merging needs all LINEs of a block or of the
+modelspace, so the merged POLYLINEs (and the LINEs that were not merged) follow the other entities.
+A SimplifyReport counts the primitives, vertices and, with measure_bytes, the JSON bytes that were saved.
+"""
+import math
+from collections import defaultdict
+
+import numpy as np
+
+import serializer
+
+MESH_FLAGS = 16 | 64  # POLYLINE 3D mesh and polyface mesh
+POLYLINE_TYPES = ('POLYLINE', 'LWPOLYLINE')
+NON_ATTRIBUTE_KEYS = ('id', 'coordinates', 'merged_ids')
+# ranges of up to this number of points are searched in a plain Python loop, longer ones with NumPy
+NUMPY_MIN_POINTS = 64
+
+
+class SimplifyReport:
+    __slots__ = ("primitives_in", "primitives_out", "vertices_in", "vertices_out", "zero_length_removed",
+                 "duplicates_removed", "lines_merged", "polylines_created", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def add_input(self, item, measure_bytes=False):
+        primitives, vertices = _count(item)
+        self.primitives_in += primitives
+        self.vertices_in += vertices
+        if measure_bytes:
+            self.bytes_in += len(serializer.dumpb(item)) + 1
+
+    def add_output(self, item, measure_bytes=False):
+        primitives, vertices = _count(item)
+        self.primitives_out += primitives
+        self.vertices_out += vertices
+        if measure_bytes:
+            self.bytes_out += len(serializer.dumpb(item)) + 1
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def summary(self):
+        saved = f"{self.primitives_in - self.primitives_out} of {self.primitives_in} primitives, " \
+                f"{self.vertices_in - self.vertices_out} of {self.vertices_in} vertices"
+        if self.bytes_in:
+            saved += f", {self.bytes_in - self.bytes_out} of {self.bytes_in} bytes"
+        return (f"Simplification saved {saved} ({self.duplicates_removed} duplicates, {self.zero_length_removed} zero-length, "
+                f"{self.lines_merged} LINEs merged into {self.polylines_created} POLYLINEs)")
+
+
+def _count(item):
+    """Number of primitives and vertices of a record, a BLOCK record counts its entities."""
+    if item['type'] == 'BLOCK':
+        vertices = 0
+        for entity in item['entities']:
+            vertices += _count(entity)[1]
+        return len(item['entities']), vertices
+    coordinates = item.get('coordinates')
+    if not coordinates:
+        return 1, 0
+    return 1, len(coordinates) if isinstance(coordinates[0], list) else 1
+
+
+def _round(value, decimals):
+    """Rounds the numbers of a (nested) coordinate list; adding 0.0 turns -0.0 into 0.0."""
+    if isinstance(value, list):
+        return [_round(v, decimals) for v in value]
+    return round(value, decimals) + 0.0
+
+
+def _snap(value, grid):
+    if isinstance(value, list):
+        return tuple(_snap(v, grid) for v in value)
+    return round(value / grid)
+
+
+def _freeze(value):
+    """A hashable form of a value without the ids of the dicts in it."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(v)) for key, v in value.items() if key != 'id'))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _attributes(entity):
+    """The attributes of an entity besides its id and geometry (ATTRIBs included), as a hashable key."""
+    return tuple(sorted((key, _freeze(value)) for key, value in entity.items() if key not in NON_ATTRIBUTE_KEYS))
+
+
+def douglas_peucker(points, tolerance, closed=False):
+    """
+    Simplifies a list of [x, y] points with the Douglas-Peucker algorithm: the points that are kept are all within
+    tolerance of the result. A closed ring is simplified as a path that returns to its first point.
+    """
+    if closed:
+        ring = douglas_peucker(points + [points[0]], tolerance)[:-1]
+        return ring if len(ring) >= 3 else points
+    count = len(points)
+    if count < 3 or tolerance <= 0:
+        return points
+    array = np.asarray(points, dtype=float) if count > NUMPY_MIN_POINTS else None
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        x0, y0 = points[first]
+        dx = points[last][0] - x0
+        dy = points[last][1] - y0
+        length = math.hypot(dx, dy)
+        if last - first > NUMPY_MIN_POINTS:
+            offsets_x = array[first + 1:last, 0] - x0
+            offsets_y = array[first + 1:last, 1] - y0
+            if length:
+                distances = np.abs(dx * offsets_y - dy * offsets_x) / length
+            else:
+                distances = np.hypot(offsets_x, offsets_y)
+            farthest = first + 1 + int(np.argmax(distances))
+            distance = distances[farthest - first - 1]
+        else:
+            distance, farthest = -1.0, first
+            for i in range(first + 1, last):
+                x, y = points[i]
+                d = abs(dx * (y - y0) - dy * (x - x0)) / length if length else math.hypot(x - x0, y - y0)
+                if d > distance:
+                    distance, farthest = d, i
+        if distance > tolerance:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _distinct_vertices(points):
+    """The points without consecutive repeats (zero-length segments)."""
+    distinct = [points[0]]
+    for point in points[1:]:
+        if point != distinct[-1]:
+            distinct.append(point)
+    return distinct
+
+
+class Simplifier:
+    def __init__(self, tolerance=0.0, decimals=None, deduplicate=True, merge_lines=True, measure_bytes=False):
+        """
+        tolerance: maximum deviation of the simplified polylines and grid of the near duplicate test (0: exact only)
+        decimals: round the coordinates to this number of decimals (None: keep them)
+        measure_bytes: include the JSON size before and after in the report (serializes every record once more)
+        """
+        self.tolerance = tolerance
+        self.decimals = decimals
+        self.deduplicate = deduplicate
+        self.merge_lines = merge_lines
+        self.measure_bytes = measure_bytes
+
+    def to_dict(self):
+        """Description of the options, e.g. for the key of the conversion cache."""
+        return {"tolerance": self.tolerance, "decimals": self.decimals, "deduplicate": self.deduplicate, "merge_lines": self.merge_lines}
+
+    def _node(self, point):
+        """The key of a line end point: the point itself, or its cell of the tolerance grid."""
+        if self.tolerance > 0:
+            return round(point[0] / self.tolerance), round(point[1] / self.tolerance)
+        return point[0], point[1]
+
+    def _geometry_key(self, entity):
+        coordinates = entity.get('coordinates')
+        if coordinates is None:
+            return None
+        key = _snap(coordinates, self.tolerance) if self.tolerance > 0 else _freeze(coordinates)
+        if entity['type'] == 'LINE' or (entity['type'] in POLYLINE_TYPES and not entity.get('is_closed')):
+            # the same segments drawn in the opposite direction
+            key = min(key, key[::-1])
+        return key
+
+    def _is_duplicate(self, entity, seen):
+        key = (_attributes(entity), self._geometry_key(entity))
+        if key in seen:
+            return True
+        seen.add(key)
+        return False
+
+    def _simplify_entity(self, entity, report):
+        """Quantizes and simplifies one entity in place, returns None when nothing is left of it."""
+        if self.decimals is not None:
+            if 'coordinates' in entity:
+                entity['coordinates'] = _round(entity['coordinates'], self.decimals)
+            for attrib in entity.get('attribs', ()):
+                attrib['coordinates'] = _round(attrib['coordinates'], self.decimals)
+        dxftype = entity['type']
+        if dxftype == 'LINE':
+            start, end = entity['coordinates']
+            if start == end:
+                report.zero_length_removed += 1
+                return None
+        elif dxftype in POLYLINE_TYPES and entity.get('coordinates'):
+            if dxftype == 'POLYLINE' and int(entity.get('flags', 0)) & MESH_FLAGS:
+                return entity
+            points = _distinct_vertices(entity['coordinates'])
+            closed = entity.get('is_closed', False)
+            if closed and len(points) > 1 and points[-1] == points[0]:
+                points.pop()
+            if len(points) < 2:
+                report.zero_length_removed += 1
+                return None
+            entity['coordinates'] = douglas_peucker(points, self.tolerance, closed)
+        return entity
+
+    def _merge(self, lines, report):
+        """Merges chains of LINEs with the same attributes into POLYLINEs, single LINEs are returned as they are."""
+        groups = defaultdict(list)
+        for line in lines:
+            groups[_attributes(line)].append(line)
+        merged = []
+        for group in groups.values():
+            if len(group) == 1:
+                merged.extend(group)
+                continue
+            ends = defaultdict(list)
+            for i, line in enumerate(group):
+                ends[self._node(line['coordinates'][0])].append(i)
+                ends[self._node(line['coordinates'][1])].append(i)
+            used = [False] * len(group)
+            for i, line in enumerate(group):
+                if used[i]:
+                    continue
+                used[i] = True
+                chain = [i]
+                points = list(line['coordinates'])
+                self._extend(group, ends, used, chain, points)
+                closed = len(chain) > 2 and self._node(points[-1]) == self._node(points[0])
+                if closed:
+                    points.pop()
+                else:
+                    # extend backwards from the start point as well
+                    chain.reverse()
+                    points.reverse()
+                    self._extend(group, ends, used, chain, points)
+                if len(chain) == 1:
+                    merged.append(line)
+                    continue
+                polyline = {key: value for key, value in line.items() if key != 'coordinates'}
+                polyline['type'] = 'POLYLINE'
+                polyline['coordinates'] = douglas_peucker(points, self.tolerance, closed)
+                polyline['is_closed'] = closed
+                polyline['merged_ids'] = [group[j]['id'] for j in chain]
+                report.lines_merged += len(chain)
+                report.polylines_created += 1
+                merged.append(polyline)
+        return merged
+
+    def _extend(self, group, ends, used, chain, points):
+        """Follows the LINEs from the last point for as long as exactly two LINEs meet at it."""
+        while True:
+            candidates = ends[self._node(points[-1])]
+            if len(candidates) != 2:
+                return
+            following = candidates[1] if candidates[0] == chain[-1] else candidates[0]
+            if used[following]:
+                return
+            used[following] = True
+            chain.append(following)
+            start, end = group[following]['coordinates']
+            points.append(end if self._node(start) == self._node(points[-1]) else start)
+
+    def _optimize(self, entities, report, seen, lines):
+        """Yields the optimized entities, LINEs are collected in lines to be merged at the end."""
+        for entity in entities:
+            entity = self._simplify_entity(entity, report)
+            if entity is None:
+                continue
+            if self.deduplicate and self._is_duplicate(entity, seen):
+                report.duplicates_removed += 1
+                continue
+            if self.merge_lines and entity['type'] == 'LINE':
+                lines.append(entity)
+            else:
+                yield entity
+
+    def simplify_entities(self, entities, report):
+        """The optimized list of the entities of a block."""
+        lines = []
+        optimized = list(self._optimize(entities, report, set(), lines))
+        if lines:
+            optimized.extend(self._merge(lines, report))
+        return optimized
+
+    def records(self, records, report=None):
+        """Passes the records through optimized, counting what was saved in the SimplifyReport."""
+        report = report if report is not None else SimplifyReport()
+        seen = set()
+        lines = []
+        for item in records:
+            report.add_input(item, self.measure_bytes)
+            if item['type'] == 'BLOCK':
+                item['entities'] = self.simplify_entities(item['entities'], report)
+                report.add_output(item, self.measure_bytes)
+                yield item
+                continue
+            for entity in self._optimize((item,), report, seen, lines):
+                report.add_output(entity, self.measure_bytes)
+                yield entity
+        for entity in self._merge(lines, report):
+            report.add_output(entity, self.measure_bytes)
+            yield entity
@@ -0,0 +1,202 @@
+"""
+Grid-based spatial index over the modelspace entities of a converted plan, for viewport and tile queries.
+
+The index stores the bounding box, id, layer and record number (line in the JSONL file) of every modelspace
+entity; INSERTs cover the extents of their (nested) block. Entities are assigned to all cells of a regular
+grid that their bounding box touches, the cells are stored sorted (CSR layout) so a query only has to look
+at the cells that overlap the query box. The index is saved as a .npz file next to the JSON output.
+"""
+import argparse
+import json
+import math
+from array import array
+
+import numpy as np
+
+import serializer
+from bounds import compute_block_bboxes, entity_bbox
+
+INDEX_FILE = "dxf_entities.index.npz"
+# entities that span more cells than this are not put in the grid but are checked on every query
+MAX_CELLS_PER_ENTITY = 64
+TARGET_ENTITIES_PER_CELL = 4
+
+
+class SpatialIndexBuilder:
+    """Collects the bounding boxes of the records of a conversion, BLOCK records must come first (as dxf2model writes them)."""
+
+    def __init__(self):
+        self.blocks = {}
+        self.block_bboxes = None
+        self.bboxes = array("d")
+        self.ids = []
+        self.layers = []
+        self.records = array("q")
+        self.record_count = 0
+
+    def add(self, record):
+        record_number = self.record_count
+        self.record_count += 1
+        if record["type"] == "BLOCK":
+            self.blocks[record["block_name"]] = record["entities"]
+            return
+        if self.block_bboxes is None:
+            self.block_bboxes = compute_block_bboxes(self.blocks)
+            self.blocks = {}
+        bbox = entity_bbox(record, self.block_bboxes)
+        if bbox is None:
+            return
+        self.bboxes.extend(bbox)
+        self.ids.append(record["id"])
+        self.layers.append(record.get("layer", ""))
+        self.records.append(record_number)
+
+    def save(self, path):
+        self.build().save(path)
+
+    def build(self, cell_size=None):
+        bboxes = np.frombuffer(self.bboxes, dtype=np.float64).reshape(-1, 4) if self.bboxes else np.zeros((0, 4))
+        return SpatialIndex.build(bboxes, np.array(self.ids, dtype=str), np.array(self.layers, dtype=str),
+                                  np.frombuffer(self.records, dtype=np.int64), cell_size)
+
+
+class SpatialIndex:
+    def __init__(self, bboxes, ids, layers, records, origin, cell_size, grid_shape, cell_keys, cell_starts, cell_entries, large):
+        self.bboxes = bboxes  # (n, 4) min_x, min_y, max_x, max_y
+        self.ids = ids
+        self.layers = layers
+        self.records = records  # record number (line in the JSONL output) of every entity
+        self.origin = origin
+        self.cell_size = cell_size
+        self.grid_shape = grid_shape  # number of columns, rows
+        self.cell_keys = cell_keys  # sorted keys (row * columns + column) of the non-empty cells
+        self.cell_starts = cell_starts  # entries of cell_keys[i] are cell_entries[cell_starts[i]:cell_starts[i + 1]]
+        self.cell_entries = cell_entries
+        self.large = large  # entities that are checked on every query
+
+    @classmethod
+    def build(cls, bboxes, ids, layers, records, cell_size=None):
+        count = len(bboxes)
+        if count:
+            origin = (float(bboxes[:, 0].min()), float(bboxes[:, 1].min()))
+            extent_x = float(bboxes[:, 2].max()) - origin[0]
+            extent_y = float(bboxes[:, 3].max()) - origin[1]
+        else:
+            origin, extent_x, extent_y = (0.0, 0.0), 0.0, 0.0
+        if cell_size is None:
+            # about TARGET_ENTITIES_PER_CELL entities per cell for uniformly spread entities
+            cell_size = math.sqrt(max(extent_x * extent_y, 1e-12) * TARGET_ENTITIES_PER_CELL / max(count, 1)) or 1.0
+        columns = int(extent_x // cell_size) + 1
+        rows = int(extent_y // cell_size) + 1
+
+        first = np.floor((bboxes[:, :2] - origin) / cell_size).astype(np.int64)
+        last = np.floor((bboxes[:, 2:] - origin) / cell_size).astype(np.int64)
+        spans = (last - first + 1)
+        cells_per_entity = spans[:, 0] * spans[:, 1]
+        is_large = cells_per_entity > MAX_CELLS_PER_ENTITY
+
+        keys = array("q")
+        entries = array("q")
+        for index in np.nonzero(~is_large)[0].tolist():
+            (c0, r0), (c1, r1) = first[index].tolist(), last[index].tolist()
+            for row in range(r0, r1 + 1):
+                for column in range(c0, c1 + 1):
+                    keys.append(row * columns + column)
+                    entries.append(index)
+        keys = np.frombuffer(keys, dtype=np.int64) if keys else np.zeros(0, dtype=np.int64)
+        entries = np.frombuffer(entries, dtype=np.int64) if entries else np.zeros(0, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys, entries = keys[order], entries[order]
+        cell_keys, cell_starts = np.unique(keys, return_index=True)
+        cell_starts = np.append(cell_starts, len(keys)).astype(np.int64)
+
+        return cls(bboxes, ids, layers, records, np.array(origin), float(cell_size), np.array([columns, rows]),
+                   cell_keys, cell_starts, entries, np.nonzero(is_large)[0])
+
+    def candidates(self, min_x, min_y, max_x, max_y):
+        columns, rows = (int(n) for n in self.grid_shape)
+        c0 = max(int((min_x - self.origin[0]) // self.cell_size), 0)
+        r0 = max(int((min_y - self.origin[1]) // self.cell_size), 0)
+        c1 = min(int((max_x - self.origin[0]) // self.cell_size), columns - 1)
+        r1 = min(int((max_y - self.origin[1]) // self.cell_size), rows - 1)
+        parts = [self.large]
+        if c0 <= c1 and r0 <= r1:
+            for row in range(r0, r1 + 1):
+                # the cells of one row are contiguous in cell_keys
+                lo = np.searchsorted(self.cell_keys, row * columns + c0)
+                hi = np.searchsorted(self.cell_keys, row * columns + c1, side="right")
+                if lo < hi:
+                    parts.append(self.cell_entries[self.cell_starts[lo]:self.cell_starts[hi]])
+        return np.unique(np.concatenate(parts)) if len(parts) > 1 else np.asarray(self.large)
+
+    def query_indices(self, min_x, min_y, max_x, max_y, layers=None):
+        """Positions (into ids, layers, records and bboxes) of the entities whose bounding box overlaps the query box."""
+        candidates = self.candidates(min_x, min_y, max_x, max_y)
+        bboxes = self.bboxes[candidates]
+        hit = (bboxes[:, 0] <= max_x) & (bboxes[:, 2] >= min_x) & (bboxes[:, 1] <= max_y) & (bboxes[:, 3] >= min_y)
+        if layers is not None:
+            hit &= np.isin(self.layers[candidates], list(layers))
+        return candidates[hit]
+
+    def query_bbox(self, min_x, min_y, max_x, max_y, layers=None):
+        """Ids of the entities overlapping the box, optionally only those on the given layers."""
+        return self.ids[self.query_indices(min_x, min_y, max_x, max_y, layers)].tolist()
+
+    @property
+    def bounds(self):
+        if not len(self.bboxes):
+            return None
+        return (float(self.bboxes[:, 0].min()), float(self.bboxes[:, 1].min()),
+                float(self.bboxes[:, 2].max()), float(self.bboxes[:, 3].max()))
+
+    def save(self, path):
+        np.savez(path, bboxes=self.bboxes, ids=self.ids, layers=self.layers, records=self.records,
+                 origin=self.origin, cell_size=np.array(self.cell_size), grid_shape=self.grid_shape,
+                 cell_keys=self.cell_keys, cell_starts=self.cell_starts, cell_entries=self.cell_entries, large=self.large)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["bboxes"], data["ids"], data["layers"], data["records"], data["origin"],
+                       float(data["cell_size"]), data["grid_shape"], data["cell_keys"], data["cell_starts"],
+                       data["cell_entries"], data["large"])
+
+
+def build_index(records, cell_size=None):
+    builder = SpatialIndexBuilder()
+    for record in records:
+        builder.add(record)
+    return builder.build(cell_size)
+
+
+def load_records(input_file):
+    """Records of a dxf_entities.json or .jsonl file."""
+    return serializer.load_records(input_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds or queries the spatial index of a converted plan.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="index a dxf_entities.json(l) file")
+    build_parser.add_argument("input_file")
+    build_parser.add_argument("-o", "--output", help=f"index file (default: {INDEX_FILE} next to the input)")
+    build_parser.add_argument("--cell-size", type=float)
+    query_parser = subparsers.add_parser("query", help="print the ids of the entities overlapping a box")
+    query_parser.add_argument("index_file")
+    query_parser.add_argument("bbox", nargs=4, type=float, metavar=("MIN_X", "MIN_Y", "MAX_X", "MAX_Y"))
+    query_parser.add_argument("--layer", action="append", dest="layers", help="only entities on this layer (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        import os
+        output = args.output or os.path.join(os.path.dirname(args.input_file), INDEX_FILE)
+        index = build_index(load_records(args.input_file), args.cell_size)
+        index.save(output)
+        print(f"Indexed {len(index.ids)} entities in {output} (cell size {index.cell_size:.3f})")
+    else:
+        index = SpatialIndex.load(args.index_file)
+        print(json.dumps(index.query_bbox(*args.bbox, layers=args.layers)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Lean streaming SVG backend with the subset of the svgwrite.Drawing API that data2svg uses, so the same draw
+functions can render through either backend.
+
+Elements are rendered to markup as soon as they are created, without svgwrite's element objects and attribute
+validation. Containers (g, symbol, defs) are written straight to the (buffered, optionally gzipped) file once
+they are added to an element that is itself already written; until then their content is kept as markup.
+Because of that, add a group to the drawing *before* drawing into it to keep memory constant.
+"""
+import gzip
+from xml.sax.saxutils import escape, quoteattr
+
+BUFFER_SIZE = 1024 * 1024
+
+
+class Container:
+    __slots__ = ("drawing", "tag", "attributes", "children", "written", "closed")
+
+    def __init__(self, drawing, tag, attributes):
+        self.drawing = drawing
+        self.tag = tag
+        self.attributes = attributes
+        self.children = []
+        self.written = False
+        self.closed = False
+
+    def add(self, element):
+        if not self.written:
+            self.children.append(element)
+        else:
+            self.drawing.write_child(self, element)
+        return element
+
+    def markup(self):
+        return f"<{self.tag}{self.attributes}>{''.join(c if isinstance(c, str) else c.markup() for c in self.children)}</{self.tag}>"
+
+
+class StreamingDrawing:
+    def __init__(self, filename, viewBox=None, precision=None, compress=None, **attributes):
+        self.filename = filename
+        self.precision = precision
+        if compress is None:
+            compress = filename.endswith(".svgz")
+        self.file = gzip.open(filename, "wt", encoding="utf-8") if compress else open(filename, "w", encoding="utf-8", buffering=BUFFER_SIZE)
+        if viewBox is not None:
+            attributes["viewBox"] = viewBox if isinstance(viewBox, str) else " ".join(self.fmt(value) for value in viewBox)
+        self.file.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        root = Container(self, "svg", ' baseProfile="full" version="1.1" xmlns="http://www.w3.org/2000/svg" '
+                                      'xmlns:xlink="http://www.w3.org/1999/xlink"' + self.attributes(attributes))
+        self.root = root
+        self.open_elements = [root]  # the written, not yet closed elements from the outside in
+        self.file.write(f"<svg{root.attributes}>")
+        root.written = True
+        # symbols are streamed into the defs as they are added, the defs end with the first element after them
+        self.defs = Container(self, "defs", "")
+        root.add(self.defs)
+
+    def number(self, value):
+        if self.precision is None:
+            return repr(value)
+        return repr(round(value, self.precision))
+
+    def fmt(self, value):
+        """A value in a path, transform or viewBox string: floats rounded like the attributes, the rest as str."""
+        return self.number(value) if isinstance(value, float) else str(value)
+
+    def attributes(self, attributes):
+        """Renders keyword arguments as SVG attributes: stroke_width=0.1 becomes stroke-width="0.1"."""
+        parts = []
+        for name, value in attributes.items():
+            if value is None:
+                continue
+            if isinstance(value, float):
+                value = self.number(value)
+            parts.append(f" {name.rstrip('_').replace('_', '-')}={quoteattr(str(value))}")
+        return "".join(parts)
+
+    def points(self, points):
+        number = self.number
+        return " ".join(f"{number(float(x))},{number(float(y))}" for x, y in points)
+
+    def write_child(self, parent, element):
+        if parent.closed:
+            raise ValueError(f"<{parent.tag}> is already written and closed")
+        # everything that was opened after parent ends before its next child
+        while self.open_elements[-1] is not parent:
+            self.close(self.open_elements.pop())
+        if isinstance(element, str):
+            self.file.write(element)
+            return
+        self.file.write(f"<{element.tag}{element.attributes}>")
+        for child in element.children:
+            self.file.write(child if isinstance(child, str) else child.markup())
+        element.children = []
+        element.written = True
+        self.open_elements.append(element)
+
+    def close(self, element):
+        self.file.write(f"</{element.tag}>")
+        element.closed = True
+
+    def add(self, element):
+        return self.root.add(element)
+
+    def save(self):
+        while self.open_elements:
+            self.close(self.open_elements.pop())
+        self.file.close()
+
+    # containers
+
+    def g(self, **attributes):
+        return Container(self, "g", self.attributes(attributes))
+
+    def symbol(self, **attributes):
+        return Container(self, "symbol", self.attributes(attributes))
+
+    # elements, returned as markup
+
+    def line(self, start, end, **attributes):
+        number = self.number
+        return (f'<line x1="{number(float(start[0]))}" y1="{number(float(start[1]))}" '
+                f'x2="{number(float(end[0]))}" y2="{number(float(end[1]))}"{self.attributes(attributes)} />')
+
+    def polyline(self, points, **attributes):
+        return f'<polyline points="{self.points(points)}"{self.attributes(attributes)} />'
+
+    def polygon(self, points, **attributes):
+        return f'<polygon points="{self.points(points)}"{self.attributes(attributes)} />'
+
+    def circle(self, center, r, **attributes):
+        number = self.number
+        return f'<circle cx="{number(float(center[0]))}" cy="{number(float(center[1]))}" r="{number(float(r))}"{self.attributes(attributes)} />'
+
+    def ellipse(self, center, r, **attributes):
+        number = self.number
+        return (f'<ellipse cx="{number(float(center[0]))}" cy="{number(float(center[1]))}" '
+                f'rx="{number(float(r[0]))}" ry="{number(float(r[1]))}"{self.attributes(attributes)} />')
+
+    def path(self, d, **attributes):
+        return f'<path d={quoteattr(d)}{self.attributes(attributes)} />'
+
+    def text(self, text, insert, **attributes):
+        number = self.number
+        return f'<text x="{number(float(insert[0]))}" y="{number(float(insert[1]))}"{self.attributes(attributes)}>{escape(str(text))}</text>'
+
+    def use(self, href, **attributes):
+        return f'<use xlink:href={quoteattr(href)}{self.attributes(attributes)} />'
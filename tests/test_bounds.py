@@ -0,0 +1,35 @@
+import copy
+
+from bounds import add_bboxes
+
+RECORDS = [
+    {"type": "BLOCK", "id": "1", "block_name": "INNER", "entities": [
+        {"type": "LINE", "id": "2", "layer": "0", "coordinates": [[0.0, 0.0], [1.0, 2.0]]},
+    ]},
+    {"type": "BLOCK", "id": "3", "block_name": "OUTER", "entities": [
+        {"type": "INSERT", "id": "4", "layer": "0", "name": "INNER", "coordinates": [10.0, 0.0], "attribs": []},
+    ]},
+    {"type": "INSERT", "id": "5", "layer": "0", "name": "OUTER", "coordinates": [0.0, 10.0], "attribs": []},
+]
+
+
+def test_blocks_are_passed_on_as_soon_as_their_nested_blocks_are_known():
+    read = []
+
+    def records():
+        for item in copy.deepcopy(RECORDS):
+            read.append(item["id"])
+            yield item
+
+    stream = add_bboxes(records())
+    assert next(stream)["bbox"] == [0.0, 0.0, 1.0, 2.0]
+    assert read == ["1"]
+    assert next(stream)["bbox"] == [10.0, 0.0, 11.0, 2.0]
+    assert read == ["1", "3"]
+    assert next(stream)["bbox"] == [0.0, 10.0, 11.0, 12.0]  # the insertion point included
+
+
+def test_blocks_before_their_nested_blocks_get_the_same_boxes():
+    in_order = {item["id"]: item.get("bbox") for item in add_bboxes(copy.deepcopy(RECORDS))}
+    reordered = [RECORDS[1], RECORDS[0], RECORDS[2]]
+    assert {item["id"]: item.get("bbox") for item in add_bboxes(copy.deepcopy(reordered))} == in_order
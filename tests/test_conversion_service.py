@@ -0,0 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conversion_service import ConversionService
+
+
+def test_timed_out_queued_jobs_release_their_slots():
+    service = ConversionService(workers=1, max_queue=4, timeout=0.5)
+    try:
+        with ThreadPoolExecutor(max_workers=5) as requests:
+            futures = [requests.submit(service.submit, time.sleep, 1) for _ in range(5)]
+            for future in futures:
+                with pytest.raises(TimeoutError):
+                    future.result()
+        deadline = time.monotonic() + 30
+        while service.health()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.1)
+        health = service.health()
+        assert health["pending"] == 0
+        assert health["cancelled"] > 0
+        # all workers + max_queue slots are free again
+        slots = [service.slots.acquire(blocking=False) for _ in range(service.workers + service.max_queue)]
+        assert all(slots)
+    finally:
+        service.close()
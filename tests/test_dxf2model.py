@@ -0,0 +1,23 @@
+import ezdxf
+
+import dxf2model
+from metrics import Metrics
+
+
+def test_skipped_blocks_are_counted(tmp_path):
+    dxf_file = str(tmp_path / "plan.dxf")
+    doc = ezdxf.new("R12")
+    doc.blocks.new("USED").add_line((0, 0), (1, 0))
+    doc.blocks.new("UNUSED").add_circle((0, 0), 1)
+    doc.blocks.new("EMPTY")
+    doc.modelspace().add_blockref("USED", (10, 10))
+    doc.modelspace().add_blockref("EMPTY", (0, 0))
+    doc.saveas(dxf_file)
+
+    metrics = Metrics()
+    records = list(dxf2model.load_records(dxf_file, metrics=metrics))
+
+    assert [record["block_name"] for record in records if record["type"] == "BLOCK"] == ["USED"]
+    # the layout blocks are counted as well: *Model_Space as unused, the empty *Paper_Space as empty
+    assert metrics.counters["blocks_skipped_unused"] == 2
+    assert metrics.counters["blocks_skipped_empty"] == 2
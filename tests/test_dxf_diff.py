@@ -0,0 +1,27 @@
+import ezdxf
+
+import dxf2model
+import dxf_diff
+
+
+def write_plan(dxf_file):
+    doc = ezdxf.new("R12")
+    block = doc.blocks.new("B")
+    block.add_line((0, 0), (1, 0))
+    block.add_circle((0, 0), 1)
+    msp = doc.modelspace()
+    msp.add_line((0, 0), (5, 5))
+    msp.add_arc((0, 0), 2, 0, 90)
+    msp.add_text("label", height=1)
+    msp.add_blockref("B", (10, 10), dxfattribs={"xscale": 2, "rotation": 30})
+    doc.saveas(dxf_file)
+
+
+def test_unchanged_file_gives_an_empty_patch(tmp_path):
+    dxf_file = str(tmp_path / "plan.dxf")
+    patch_file = tmp_path / "patch.jsonl"
+    write_plan(dxf_file)
+    dxf2model.convert_file(dxf_file, str(tmp_path / "output"))
+
+    dxf_diff.main([dxf_file, str(tmp_path / "output" / "dxf_entities.jsonl"), "-o", str(patch_file)])
+    assert patch_file.read_bytes() == b""
@@ -0,0 +1,37 @@
+import math
+
+from explode import explode_records
+
+
+def explode_scaled_insert(xscale, yscale):
+    return list(explode_records([
+        {"type": "BLOCK", "id": "1", "block_name": "B", "entities": [
+            {"type": "CIRCLE", "id": "2", "layer": "0", "coordinates": [0.0, 0.0], "radius": 1.0},
+            {"type": "ARC", "id": "3", "layer": "0", "coordinates": [0.0, 0.0], "radius": 1.0, "start_angle": 0.0, "end_angle": 90.0},
+            {"type": "TEXT", "id": "4", "layer": "0", "coordinates": [0.0, 0.0], "text": "T", "height": "1.0", "rotation": 0.0},
+        ]},
+        {"type": "INSERT", "id": "5", "layer": "L", "name": "B", "coordinates": [10.0, 10.0],
+         "xscale": xscale, "yscale": yscale, "rotation": 0.0, "attribs": []},
+    ]))
+
+
+def on_ellipse(point, rx, ry):
+    return math.isclose(((point[0] - 10.0) / rx) ** 2 + ((point[1] - 10.0) / ry) ** 2, 1.0)
+
+
+def test_non_uniform_scale_flattens_circles_and_arcs():
+    circle, arc, text = explode_scaled_insert(2.0, 1.0)
+    assert circle["type"] == "POLYLINE" and circle["is_closed"]
+    assert "radius" not in circle
+    assert all(on_ellipse(point, 2.0, 1.0) for point in circle["coordinates"])
+    assert arc["type"] == "POLYLINE" and not arc["is_closed"]
+    assert arc["coordinates"][0] == [12.0, 10.0]
+    assert all(on_ellipse(point, 2.0, 1.0) for point in arc["coordinates"])
+    assert float(text["height"]) == 1.0 and text["width"] == 2.0
+
+
+def test_uniform_scale_keeps_circles_and_arcs():
+    circle, arc, text = explode_scaled_insert(2.0, 2.0)
+    assert (circle["type"], circle["radius"]) == ("CIRCLE", 2.0)
+    assert (arc["type"], arc["radius"], arc["end_angle"]) == ("ARC", 2.0, 90.0)
+    assert float(text["height"]) == 2.0 and "width" not in text
@@ -0,0 +1,51 @@
+import pytest
+
+import data2svg
+from render_model import RenderModel
+
+
+def scaled_block_model(xscale, yscale):
+    """A modelspace INSERT of a block with a CIRCLE and an ARC, scaled by xscale and yscale."""
+    return RenderModel.from_records([
+        {"type": "BLOCK", "id": "1", "block_name": "B", "entities": [
+            {"type": "CIRCLE", "id": "2", "layer": "0", "coordinates": [0.0, 0.0], "radius": 1.0},
+            {"type": "ARC", "id": "3", "layer": "0", "coordinates": [0.0, 0.0], "radius": 1.0, "start_angle": 0.0, "end_angle": 90.0},
+        ]},
+        {"type": "INSERT", "id": "4", "layer": "0", "name": "B", "coordinates": [10.0, 10.0],
+         "xscale": xscale, "yscale": yscale, "rotation": 0.0, "attribs": []},
+    ])
+
+
+@pytest.mark.parametrize("writer", ["svgwrite", "stream"])
+def test_non_uniformly_scaled_circle_is_drawn_as_ellipse(tmp_path, writer):
+    output_file = str(tmp_path / "output.svg")
+    data2svg.render(scaled_block_model(2.0, 1.0), output_file, use_symbols=False, writer=writer)
+    with open(output_file) as f:
+        svg = f.read()
+    assert "<ellipse" in svg
+    assert 'rx="2.0"' in svg and 'ry="1.0"' in svg
+
+
+@pytest.mark.parametrize("writer", ["svgwrite", "stream"])
+def test_nested_attribs_turn_and_scale_with_their_parent_insert(tmp_path, writer):
+    model = RenderModel.from_records([
+        {"type": "BLOCK", "id": "1", "block_name": "INNER", "entities": [
+            {"type": "ATTDEF", "id": "2", "layer": "0", "coordinates": [0.0, 0.0], "tag": "T", "height": "1.0"},
+        ]},
+        {"type": "BLOCK", "id": "3", "block_name": "OUTER", "entities": [
+            {"type": "TEXT", "id": "4", "layer": "0", "coordinates": [0.0, 0.0], "text": "text", "height": "1.0", "rotation": 0.0},
+            {"type": "INSERT", "id": "5", "layer": "0", "name": "INNER", "coordinates": [0.0, 0.0], "rotation": 0.0,
+             "attribs": [{"type": "ATTRIB", "id": "6", "layer": "0", "coordinates": [0.0, 0.0], "tag": "T", "text": "attrib",
+                          "height": "1.0", "rotation": 0.0}]},
+        ]},
+        {"type": "INSERT", "id": "7", "layer": "0", "name": "OUTER", "coordinates": [10.0, 10.0],
+         "xscale": 3.0, "yscale": 3.0, "rotation": 90.0, "attribs": []},
+    ])
+    output_file = str(tmp_path / "output.svg")
+    data2svg.render(model, output_file, use_symbols=False, writer=writer)
+    with open(output_file) as f:
+        texts = [line for line in f.read().replace("><", ">\n<").splitlines() if line.startswith("<text")]
+    assert len(texts) == 2
+    for text in texts:
+        assert 'font-size="3.0"' in text
+        assert "rotate(90.0," in text
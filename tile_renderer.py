@@ -0,0 +1,164 @@
+"""
+Tiled, level-of-detail SVG rendering of a converted plan.
+
+The plan is split into a zoom pyramid: level 0 is a single square tile over the whole plan, every next level
+halves the tile size until the finest level has tiles of at most --tile-size drawing units. Each tile is an
+independent SVG file <output>/<level>/<column>/<row>.svg (row 0 at the bottom of the plan) of tile_pixels
+pixels wide, with only the entities that overlap it (found with the spatial index) and the symbols of the
+blocks they use. Detail smaller than what a pixel of the level can show (tiny texts, short segments, small
+circles and block inserts) is left out of the coarser levels. Tiles are rendered in parallel worker
+processes, empty tiles are not written.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import data2svg
+from spatial_index import SpatialIndex, build_index
+
+DEFAULT_TILE_SIZE = 256.0  # drawing units of a tile at the finest level
+DEFAULT_TILE_PIXELS = 256
+MIN_FEATURE_PIXELS = 0.5  # entities smaller than this are dropped
+MIN_TEXT_PIXELS = 2.0  # texts lower than this are dropped
+
+# model of the worker process, loaded once by init_worker
+_model = None
+_model_source = None
+
+
+def plan_pyramid(bounds, tile_size=DEFAULT_TILE_SIZE):
+    """Returns the origin, the size of the level 0 tile and the number of levels for the given plan bounds."""
+    min_x, min_y, max_x, max_y = bounds
+    extent = max(max_x - min_x, max_y - min_y, tile_size)
+    levels = max(math.ceil(math.log2(extent / tile_size)), 0) + 1
+    return (min_x, min_y), tile_size * 2 ** (levels - 1), levels
+
+
+def used_blocks(entities, blocks):
+    """Names of the blocks the entities insert, nested blocks included."""
+    used = set()
+    stack = [entity.name for entity in entities if entity.type == 'INSERT']
+    while stack:
+        name = stack.pop()
+        if name in used or name not in blocks:
+            continue
+        used.add(name)
+        stack.extend(e.name for e in blocks[name].entities if e.type == 'INSERT')
+    return used
+
+
+def visible(entity, bbox, pixel_size):
+    """Level-of-detail test: is the entity large enough to show at this pixel size?"""
+    if entity.type == 'TEXT':
+        return float(entity.height or 0) >= MIN_TEXT_PIXELS * pixel_size
+    if entity.type == 'POINT':
+        return True
+    return max(bbox[2] - bbox[0], bbox[3] - bbox[1]) >= MIN_FEATURE_PIXELS * pixel_size
+
+
+def init_worker(input_file, index_file):
+    global _model, _model_source
+    if _model_source == (input_file, index_file):
+        return  # forked from the parent process, which already loaded it
+    model = data2svg.load_model(input_file)
+    blocks, entities = model.blocks, model.entities
+    # the index is built from the JSON form of the records
+    index = SpatialIndex.load(index_file) if index_file else build_index(
+        [{'type': 'BLOCK', 'block_name': name, 'entities': [e.to_dict() for e in block.entities]} for name, block in blocks.items()]
+        + [entity.to_dict() for entity in entities])
+    # the index refers to records by their position in the file, which counts the BLOCK records first
+    _model = (blocks, entities, index, len(blocks))
+    _model_source = (input_file, index_file)
+
+
+def render_tile(level, column, row, origin, tile_units, output_dir, tile_pixels, writer, precision):
+    """Renders one tile, returns the number of drawn entities (0: nothing written)."""
+    blocks, entities, index, first_record = _model
+    min_x = origin[0] + column * tile_units
+    min_y = origin[1] + row * tile_units
+    max_x, max_y = min_x + tile_units, min_y + tile_units
+    pixel_size = tile_units / tile_pixels
+
+    positions = index.query_indices(min_x, min_y, max_x, max_y)
+    tile_entities = [
+        entities[index.records[i] - first_record]
+        for i in sorted(positions.tolist(), key=lambda i: index.records[i])  # keep the drawing order
+        if visible(entities[index.records[i] - first_record], index.bboxes[i], pixel_size)
+    ]
+    if not tile_entities:
+        return 0
+
+    path = os.path.join(output_dir, str(level), str(column), f"{row}.svg")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dwg = data2svg.create_drawing(path, (min_x, -max_y, tile_units, tile_units), writer, precision, size=(tile_pixels, tile_pixels))
+    tile_blocks = {name: blocks[name] for name in used_blocks(tile_entities, blocks)}
+    data2svg.define_symbols(tile_blocks, dwg)
+    group = dwg.g(transform='scale(1, -1)')
+    dwg.add(group)
+    data2svg.draw_entities(tile_entities, group, tile_blocks, dwg, use_symbols=True)
+    dwg.save()
+    return len(tile_entities)
+
+
+def render_tiles(input_file, output_dir, tile_size=DEFAULT_TILE_SIZE, tile_pixels=DEFAULT_TILE_PIXELS,
+                 levels=None, workers=None, writer='stream', precision=3, index_file=None):
+    """Renders the tile pyramid of a plan and writes a tiles.json manifest; returns the manifest."""
+    init_worker(input_file, index_file)
+    bounds = _model[2].bounds
+    if bounds is None:
+        raise ValueError(f"{input_file} has no modelspace geometry")
+    origin, top_tile_units, max_levels = plan_pyramid(bounds, tile_size)
+    levels = max_levels if levels is None else min(levels, max_levels)
+
+    tasks = []
+    for level in range(levels):
+        tile_units = top_tile_units / 2 ** level
+        columns = math.ceil((bounds[2] - origin[0]) / tile_units) or 1
+        rows = math.ceil((bounds[3] - origin[1]) / tile_units) or 1
+        for column in range(columns):
+            for row in range(rows):
+                tasks.append((level, column, row, origin, tile_units, output_dir, tile_pixels, writer, precision))
+
+    start = time.perf_counter()
+    # the workers are forked (or spawned and load the model once) instead of receiving it with every tile
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(input_file, index_file)) as executor:
+        counts = list(executor.map(render_tile, *zip(*tasks), chunksize=max(1, len(tasks) // 64)))
+
+    manifest = {
+        "bounds": bounds,
+        "origin": origin,
+        "levels": [{"level": level, "tile_units": top_tile_units / 2 ** level} for level in range(levels)],
+        "tile_pixels": tile_pixels,
+        "tiles": sum(1 for count in counts if count),
+        "empty_tiles": sum(1 for count in counts if not count),
+        "seconds": time.perf_counter() - start,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "tiles.json"), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Renders a converted plan as a pyramid of SVG tiles.")
+    parser.add_argument("input_file", help="dxf_entities.json or .jsonl")
+    parser.add_argument("-o", "--output-dir", default="output/tiles")
+    parser.add_argument("--index", help="spatial index of the input (built in memory when omitted)")
+    parser.add_argument("--tile-size", type=float, default=DEFAULT_TILE_SIZE, help="drawing units per tile at the finest level")
+    parser.add_argument("--tile-pixels", type=int, default=DEFAULT_TILE_PIXELS)
+    parser.add_argument("--levels", type=int, help="render only the coarsest levels")
+    parser.add_argument("-j", "--workers", type=int)
+    parser.add_argument("--writer", choices=["svgwrite", "stream"], default="stream")
+    parser.add_argument("--precision", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    manifest = render_tiles(args.input_file, args.output_dir, args.tile_size, args.tile_pixels, args.levels,
+                            args.workers, args.writer, args.precision, args.index)
+    print(f"Rendered {manifest['tiles']} tiles in {len(manifest['levels'])} levels ({manifest['seconds']:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+# below this number of points a plain Python loop is faster than converting to and from a NumPy array
+NUMPY_MIN_POINTS = 8
+
+
+class Affine:
+    """
+    2D affine transformation, stored as the 3x3 matrix
+
+        | a c e |
+        | b d f |
+        | 0 0 1 |
+
+    which maps (x, y) to (a*x + c*y + e, b*x + d*y + f), the same layout as the SVG matrix() transform.
+    Compose with @: (outer @ inner) first applies inner, then outer.
+    """
+
+    __slots__ = ("a", "b", "c", "d", "e", "f")
+
+    def __init__(self, a=1.0, b=0.0, c=0.0, d=1.0, e=0.0, f=0.0):
+        self.a, self.b, self.c, self.d, self.e, self.f = a, b, c, d, e, f
+
+    @classmethod
+    def from_insert(cls, scale, rotation, translation):
+        """Scales, then rotates (degrees, counterclockwise), then translates, as an INSERT places its block."""
+        angle_rad = math.radians(rotation)
+        cos, sin = math.cos(angle_rad), math.sin(angle_rad)
+        sx, sy = scale
+        return cls(sx * cos, sx * sin, -sy * sin, sy * cos, translation[0], translation[1])
+
+    @classmethod
+    def from_entity(cls, entity):
+        """The transformation of an INSERT entity dict."""
+        return cls.from_insert((entity.get('xscale', 1.0), entity.get('yscale', 1.0)), entity.get('rotation', 0), entity['coordinates'])
+
+    @classmethod
+    def from_record(cls, insert):
+        """The transformation of an INSERT record (see entity_model)."""
+        xscale = insert.xscale if insert.xscale is not None else 1.0
+        yscale = insert.yscale if insert.yscale is not None else 1.0
+        return cls.from_insert((xscale, yscale), insert.rotation if insert.rotation is not None else 0, insert.coordinates)
+
+    def __matmul__(self, other):
+        return Affine(
+            self.a * other.a + self.c * other.b,
+            self.b * other.a + self.d * other.b,
+            self.a * other.c + self.c * other.d,
+            self.b * other.c + self.d * other.d,
+            self.a * other.e + self.c * other.f + self.e,
+            self.b * other.e + self.d * other.f + self.f,
+        )
+
+    @property
+    def matrix(self):
+        return np.array([[self.a, self.c, self.e], [self.b, self.d, self.f], [0.0, 0.0, 1.0]])
+
+    @property
+    def rotation(self):
+        """Rotation angle in degrees of the x-axis."""
+        return math.degrees(math.atan2(self.b, self.a))
+
+    @property
+    def scale(self):
+        return math.hypot(self.a, self.b), math.hypot(self.c, self.d)
+
+    def apply_point(self, point):
+        x, y = point[0], point[1]
+        return [self.a * x + self.c * y + self.e, self.b * x + self.d * y + self.f]
+
+    def apply_array(self, points):
+        """Transforms an (n, 2) array of points in one batch and returns an (n, 2) array."""
+        points = np.asarray(points, dtype=np.float64)
+        return points @ np.array([[self.a, self.b], [self.c, self.d]]) + (self.e, self.f)
+
+    def apply(self, points):
+        """Transforms a list of points and returns a list of [x, y] lists."""
+        if len(points) < NUMPY_MIN_POINTS:
+            return [self.apply_point(point) for point in points]
+        return self.apply_array(points).tolist()
+
+    def apply_packed(self, coordinates):
+        """Transforms points packed as x0, y0, x1, y1, ... (see entity_model) and returns a list of [x, y] lists."""
+        if len(coordinates) < 2 * NUMPY_MIN_POINTS:
+            a, b, c, d, e, f = self.a, self.b, self.c, self.d, self.e, self.f
+            values = iter(coordinates)
+            return [[a * x + c * y + e, b * x + d * y + f] for x, y in zip(values, values)]
+        return self.apply_array(np.frombuffer(coordinates, dtype=np.float64).reshape(-1, 2)).tolist()
+
+    def svg(self, fmt=str):
+        """The SVG matrix() transform, fmt formats its numbers (see data2svg.number_format)."""
+        return f"matrix({fmt(self.a)} {fmt(self.b)} {fmt(self.c)} {fmt(self.d)} {fmt(self.e)} {fmt(self.f)})"